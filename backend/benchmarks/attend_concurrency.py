@@ -0,0 +1,137 @@
+"""
+Fire thousands of simultaneous registrations at a single event and check that
+none are lost and nobody is registered twice. With --capacity the event has
+limited General seats, and the run also checks that none are oversold or leaked.
+
+Run from the backend directory against a scratch database:
+
+    python -m benchmarks.attend_concurrency --users 2000 --repeat 2
+    python -m benchmarks.attend_concurrency --users 5000 --capacity 1000
+"""
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi import HTTPException
+from src.db.indexes import ensure_indexes
+from src.db.main import create_client, pool_monitor
+from src.errors import SoldOut
+from src.events.schemas import EventCreateModel
+from src.services import create_services
+
+
+async def run(args):
+    client = create_client(maxPoolSize=args.pool_size)
+    pool_monitor.max_pool_size = args.pool_size
+    await client.drop_database(args.database)
+    db = client[args.database]
+    await ensure_indexes(db)
+
+    services = create_services(db)
+    event_service = services.event_service
+    event = await event_service.create_event(EventCreateModel(
+        name="Benchmark On-Sale",
+        description="Concurrent registration benchmark",
+        type="concert",
+        location="Dhaka",
+        date=datetime.now() + timedelta(days=30),
+        general_price=0,
+        vip_price=0,
+        general_capacity=args.capacity,
+    ))
+
+    users = [
+        {
+            "email": f"bench{i}@example.com",
+            "password_hash": "x",
+            "role": "user",
+            "first_name": "Bench",
+            "last_name": str(i),
+            "tickets": {},
+        }
+        for i in range(args.users)
+    ]
+    result = await db["users"].insert_many(users)
+    user_ids = [str(user_id) for user_id in result.inserted_ids]
+
+    outcomes = {"registered": 0, "duplicate": 0, "sold_out": 0}
+    latencies = []
+
+    async def register(user_id: str):
+        started = time.perf_counter()
+        try:
+            await event_service.attend_event(event.id, user_id, "Bench", "User", "General")
+            outcomes["registered"] += 1
+        except SoldOut:
+            outcomes["sold_out"] += 1
+        except HTTPException as e:
+            if e.status_code != 409:
+                raise
+            outcomes["duplicate"] += 1
+        latencies.append(time.perf_counter() - started)
+
+    # Every user registers `repeat` times at once so duplicate protection is exercised too
+    started = time.perf_counter()
+    await asyncio.gather(*(register(user_id) for _ in range(args.repeat) for user_id in user_ids))
+    elapsed = time.perf_counter() - started
+
+    # Tickets are issued by background jobs; run them here before checking
+    started = time.perf_counter()
+    await services.jobs.drain(["issue_ticket"])
+    issuance = time.perf_counter() - started
+
+    stored = await db["events"].find_one({"_id": ObjectId(event.id)})
+    attendees = await db["registrations"].distinct("user_id", {"event_id": ObjectId(event.id)})
+    registrations = await db["registrations"].count_documents({"event_id": ObjectId(event.id)})
+    ticket_holders = await db["users"].count_documents({f"tickets.{event.id}": {"$exists": True}})
+    remaining = (await event_service.get_availability(event.id))["General"]["available"]
+
+    pool = pool_monitor.stats()
+    latencies.sort()
+    attempts = len(latencies)
+    print(f"attempts:        {attempts}")
+    print(f"registered:      {outcomes['registered']}")
+    print(f"duplicates:      {outcomes['duplicate']}")
+    if args.capacity is not None:
+        print(f"sold out:        {outcomes['sold_out']} ({remaining}/{args.capacity} seats left)")
+    print(f"stored:          {registrations} ({len(attendees)} unique)")
+    print(f"counter:         {stored['general_attendee_count']}")
+    print(f"ticket holders:  {ticket_holders}")
+    print(f"throughput:      {attempts / elapsed:.0f} req/s")
+    print(f"latency p50/p99: {statistics.median(latencies) * 1000:.1f}ms / "
+          f"{latencies[int(attempts * 0.99) - 1] * 1000:.1f}ms")
+    print(f"issuance:        {issuance:.1f}s for the queued tickets")
+    print(f"pool:            {max((s['peak_in_use'] for s in pool['servers'].values()), default=0)}/{args.pool_size} peak in use, "
+          f"{pool['checkout_wait_seconds_total'] / max(pool['checkouts_total'], 1) * 1000:.2f}ms mean checkout wait")
+
+    await services.close()
+    if not args.keep:
+        await client.drop_database(args.database)
+
+    lost = outcomes["registered"] - len(attendees)
+    if args.capacity is None:
+        lost = max(lost, args.users - len(attendees))
+    consistent = registrations == len(attendees) == stored["general_attendee_count"] == ticket_holders
+    if lost or not consistent:
+        raise SystemExit(f"FAILED: {lost} registrations lost")
+    if args.capacity is not None and registrations + remaining != args.capacity:
+        raise SystemExit(f"FAILED: {registrations} registered + {remaining} left != capacity {args.capacity}")
+    print("OK: no registrations lost" + (", no seats oversold or leaked" if args.capacity is not None else ""))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--repeat", type=int, default=2, help="registration attempts per user")
+    parser.add_argument("--capacity", type=int, default=None, help="General seats; unlimited when omitted")
+    parser.add_argument("--pool-size", type=int, default=100)
+    parser.add_argument("--database", default="event_management_bench")
+    parser.add_argument("--keep", action="store_true", help="keep the benchmark database afterwards")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
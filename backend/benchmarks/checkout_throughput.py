@@ -0,0 +1,76 @@
+"""
+Benchmark checkout session creation through StripeClient against the fake
+Stripe server, with no network access needed.
+
+    python -m benchmarks.checkout_throughput --requests 2000 --concurrency 100
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+import uvicorn
+
+from benchmarks.fake_stripe import app as fake_stripe_app
+from src.payments.stripe_client import StripeClient
+from src.payments.stripe_service import StripeService
+
+
+async def run(args):
+    server = uvicorn.Server(uvicorn.Config(fake_stripe_app, port=args.port, log_level="warning"))
+    server_task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+
+    client = StripeClient(
+        api_key="sk_test_fake",
+        base_url=f"http://127.0.0.1:{args.port}",
+        timeout=args.timeout,
+        max_retries=args.retries,
+        max_connections=args.connections,
+    )
+    stripe_service = StripeService(client)
+    slots = asyncio.Semaphore(args.concurrency)
+    latencies = []
+
+    async def checkout(i: int):
+        async with slots:
+            started = time.perf_counter()
+            await stripe_service.create_checkout_session(
+                user_email=f"bench{i}@example.com",
+                amount=25.0,
+                event_name="Benchmark",
+                ticket_type="General",
+                metadata={"event_id": "bench", "user_id": str(i), "ticket_type": "General"},
+            )
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(checkout(i) for i in range(args.requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    print(f"requests:        {args.requests}")
+    print(f"throughput:      {args.requests / elapsed:.0f} checkouts/s")
+    print(f"latency p50/p99: {statistics.median(latencies) * 1000:.1f}ms / "
+          f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:.1f}ms")
+    print(f"client stats:    {client.stats()}")
+
+    await client.close()
+    server.should_exit = True
+    await server_task
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--connections", type=int, default=20)
+    parser.add_argument("--timeout", type=float, default=5.0)
+    parser.add_argument("--retries", type=int, default=2)
+    parser.add_argument("--port", type=int, default=12111)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""
+Minimal in-memory stand-in for the Stripe Checkout API, for offline runs.
+
+    uvicorn benchmarks.fake_stripe:app --port 12111
+    STRIPE_API_BASE=http://127.0.0.1:12111 uvicorn main:app
+
+FAKE_STRIPE_LATENCY_MS and FAKE_STRIPE_FAILURE_RATE add artificial latency and
+random 503s so timeouts and retries can be exercised.
+"""
+import asyncio
+import os
+import random
+import uuid
+from urllib.parse import parse_qsl
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+LATENCY_SECONDS = float(os.environ.get("FAKE_STRIPE_LATENCY_MS", "0")) / 1000
+FAILURE_RATE = float(os.environ.get("FAKE_STRIPE_FAILURE_RATE", "0"))
+
+app = FastAPI(title="Fake Stripe")
+sessions: dict[str, dict] = {}
+
+
+def _unflatten(pairs: list[tuple[str, str]]) -> dict:
+    """Turn `metadata[event_id]=...` style keys back into nested dicts."""
+    result = {}
+    for key, value in pairs:
+        parts = key.replace("]", "").split("[")
+        node = result
+        for part in parts[:-1]:
+            node = node.setdefault(part, {})
+        node[parts[-1]] = value
+    return result
+
+
+async def _simulate():
+    if LATENCY_SECONDS:
+        await asyncio.sleep(LATENCY_SECONDS)
+    if FAILURE_RATE and random.random() < FAILURE_RATE:
+        return JSONResponse({"error": {"message": "Simulated outage"}}, status_code=503)
+    return None
+
+
+@app.post("/v1/checkout/sessions")
+async def create_session(request: Request):
+    if failure := await _simulate():
+        return failure
+
+    params = _unflatten(parse_qsl((await request.body()).decode()))
+    session_id = f"cs_test_{uuid.uuid4().hex}"
+    session = {
+        "id": session_id,
+        "object": "checkout.session",
+        "url": f"https://checkout.stripe.com/c/pay/{session_id}",
+        "payment_status": "paid",
+        "status": "complete",
+        "customer_email": params.get("customer_email"),
+        "metadata": params.get("metadata", {}),
+    }
+    sessions[session_id] = session
+    return session
+
+
+@app.get("/v1/checkout/sessions/{session_id}")
+async def retrieve_session(session_id: str):
+    if failure := await _simulate():
+        return failure
+
+    if session_id not in sessions:
+        return JSONResponse({"error": {"message": f"No such checkout.session: {session_id}"}}, status_code=404)
+    return sessions[session_id]
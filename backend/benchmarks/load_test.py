@@ -0,0 +1,255 @@
+"""
+Load-test the API in-process and report per-endpoint throughput and latency.
+
+Boots the FastAPI app from main.py behind httpx's ASGI transport (no sockets,
+no server) against the MongoDB in DATABASE_URL, or against mongomock-motor
+when --in-memory is given. Seeds users and events, then lets virtual users
+drive a weighted mix of signup, login, event listing, event reads, attend and
+ticket download.
+
+    python -m benchmarks.load_test --users 200 --events 5000 --vus 50 --duration 60 \\
+        --output results/run.json --compare results/baseline.json
+
+Results are written as JSON; --compare prints the change against an earlier
+run and exits non-zero if any endpoint's p95 regressed past --threshold.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import platform
+import random
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+
+DEFAULT_MIX = {
+    "signup": 2,
+    "login": 5,
+    "list_events": 50,
+    "get_event": 25,
+    "attend": 10,
+    "ticket_download": 8,
+}
+PASSWORD = "benchmark-password"
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(q * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies: dict[str, list[float]] = {}
+        self.errors: dict[str, int] = {}
+
+    def record(self, name: str, seconds: float, ok: bool):
+        self.latencies.setdefault(name, []).append(seconds)
+        if not ok:
+            self.errors[name] = self.errors.get(name, 0) + 1
+
+    def report(self, elapsed: float) -> dict:
+        endpoints = {}
+        for name, values in sorted(self.latencies.items()):
+            values.sort()
+            endpoints[name] = {
+                "requests": len(values),
+                "errors": self.errors.get(name, 0),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 0.50) * 1000, 2),
+                "p95_ms": round(percentile(values, 0.95) * 1000, 2),
+                "p99_ms": round(percentile(values, 0.99) * 1000, 2),
+                "max_ms": round(values[-1] * 1000, 2),
+            }
+        total = sum(len(values) for values in self.latencies.values())
+        return {"elapsed_s": round(elapsed, 2), "total_requests": total,
+                "throughput_rps": round(total / elapsed, 2), "endpoints": endpoints}
+
+
+async def use_in_memory_database(app):
+    from mongomock_motor import AsyncMongoMockClient
+
+    from src.db.main import DATABASE_NAME
+    from src.services import create_services
+
+    db = AsyncMongoMockClient()[DATABASE_NAME]
+    app.state.db = db
+    app.state.services = create_services(db)
+    # Tickets are issued by background jobs, which the skipped lifespan would start
+    await app.state.services.jobs.start()
+
+
+async def seed(db, users: int, events: int) -> list[str]:
+    from src.auth.utils import passwd_context
+
+    await db["users"].delete_many({"email": {"$regex": "^loadtest-"}})
+    await db["events"].delete_many({"type": "loadtest"})
+
+    password_hash = passwd_context.hash(PASSWORD)
+    await db["users"].insert_many([
+        {"email": f"loadtest-{i}@example.com", "password_hash": password_hash, "role": "user",
+         "first_name": "Load", "last_name": f"Test{i}", "tickets": {}}
+        for i in range(users)
+    ])
+
+    now = datetime.now()
+    locations = ["Dhaka", "Chittagong", "Sylhet", "Khulna"]
+    result = await db["events"].insert_many([
+        {"name": f"Load test event {i}", "description": "Seeded by benchmarks.load_test",
+         "type": "loadtest", "location": random.choice(locations),
+         "date": now + timedelta(hours=i), "created_at": now,
+         "general_price": 0.0, "vip_price": 0.0,
+         "general_attendee_count": 0, "vip_attendee_count": 0}
+        for i in range(events)
+    ])
+    return [str(event_id) for event_id in result.inserted_ids]
+
+
+class VirtualUser:
+    def __init__(self, client: httpx.AsyncClient, recorder: Recorder, email: str, event_ids: list[str]):
+        self.client = client
+        self.recorder = recorder
+        self.email = email
+        self.event_ids = event_ids
+        self.attended: list[str] = []
+
+    async def call(self, name: str, method: str, url: str, ok_statuses=(200, 201), **kwargs) -> httpx.Response:
+        started = time.perf_counter()
+        response = await self.client.request(method, url, **kwargs)
+        self.recorder.record(name, time.perf_counter() - started, response.status_code in ok_statuses)
+        return response
+
+    async def login(self):
+        await self.call("login", "POST", "/api/v1/auth/login", json={"email": self.email, "password": PASSWORD})
+
+    async def signup(self):
+        email = f"loadtest-{uuid.uuid4().hex[:12]}@example.com"
+        await self.call("signup", "POST", "/api/v1/auth/signup", json={"email": email, "password": PASSWORD})
+
+    async def list_events(self):
+        params = random.choice([{}, {"type": "loadtest"}, {"location": "Dhaka"}, {"min_price": 0, "max_price": 10}])
+        await self.call("list_events", "GET", "/api/v1/event/events", params={**params, "limit": 20})
+
+    async def get_event(self):
+        await self.call("get_event", "GET", f"/api/v1/event/{random.choice(self.event_ids)}")
+
+    async def attend(self):
+        event_id = random.choice(self.event_ids)
+        response = await self.call(
+            "attend", "POST", f"/api/v1/event/{event_id}/attend", ok_statuses=(200, 202, 409),
+            json={"event_id": event_id, "type": "General"},
+        )
+        if response.status_code in (200, 202):
+            self.attended.append(event_id)
+
+    async def ticket_download(self):
+        if not self.attended:
+            return await self.attend()
+        event_id = random.choice(self.attended)
+        await self.call("ticket_download", "GET", f"/api/v1/auth/me/events/{event_id}/ticket")
+
+    async def run(self, mix: dict[str, int], deadline: float):
+        await self.login()
+        names, weights = zip(*mix.items())
+        while time.perf_counter() < deadline:
+            await getattr(self, random.choices(names, weights)[0])()
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        return "unknown"
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> bool:
+    regressed = False
+    print(f"\n{'endpoint':<18}{'p95 before':>12}{'p95 after':>12}{'change':>10}")
+    for name, after in report["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if not before or not before["p95_ms"]:
+            continue
+        change = (after["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100
+        flag = "  REGRESSION" if change > threshold else ""
+        regressed |= change > threshold
+        print(f"{name:<18}{before['p95_ms']:>12}{after['p95_ms']:>12}{change:>9.1f}%{flag}")
+    return regressed
+
+
+async def run(args):
+    from main import app
+
+    mix = {**DEFAULT_MIX, **json.loads(args.mix)} if args.mix else DEFAULT_MIX
+    recorder = Recorder()
+
+    # mongomock cannot explain() queries, so the lifespan's startup index check is skipped in memory
+    if args.in_memory:
+        await use_in_memory_database(app)
+        lifespan = contextlib.nullcontext()
+    else:
+        lifespan = app.router.lifespan_context(app)
+    async with lifespan:
+        event_ids = await seed(app.state.db, args.users, args.events)
+        transport = httpx.ASGITransport(app=app)
+        clients = [
+            httpx.AsyncClient(transport=transport, base_url="https://loadtest.local", timeout=60)
+            for _ in range(args.vus)
+        ]
+        vus = [
+            VirtualUser(client, recorder, f"loadtest-{i % args.users}@example.com", event_ids)
+            for i, client in enumerate(clients)
+        ]
+
+        started = time.perf_counter()
+        deadline = started + args.duration
+        await asyncio.gather(*(vu.run(mix, deadline) for vu in vus))
+        elapsed = time.perf_counter() - started
+
+        for client in clients:
+            await client.aclose()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "revision": git_revision(),
+            "python": platform.python_version(),
+            "database": "mongomock" if args.in_memory else "mongodb",
+            "users": args.users, "events": args.events, "vus": args.vus,
+            "duration_s": args.duration, "mix": mix,
+        },
+        **recorder.report(elapsed),
+    }
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        Path(args.output).write_text(output)
+    if args.compare and compare(report, json.loads(Path(args.compare).read_text()), args.threshold):
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=100, help="seeded accounts")
+    parser.add_argument("--events", type=int, default=1000, help="seeded events")
+    parser.add_argument("--vus", type=int, default=20, help="concurrent virtual users")
+    parser.add_argument("--duration", type=float, default=30, help="seconds to run")
+    parser.add_argument("--mix", help='JSON weights overriding the default mix, e.g. \'{"login": 0}\'')
+    parser.add_argument("--in-memory", action="store_true", help="use mongomock-motor instead of MongoDB")
+    parser.add_argument("--output", help="write the JSON report here")
+    parser.add_argument("--compare", help="earlier JSON report to diff against")
+    parser.add_argument("--threshold", type=float, default=10.0, help="allowed p95 regression in percent")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
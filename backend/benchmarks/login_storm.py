@@ -0,0 +1,82 @@
+"""
+Measure event-loop latency while a storm of password verifications runs,
+first inline (the old behaviour) and then through the bcrypt thread pool.
+
+    python -m benchmarks.login_storm --logins 50 --rounds 12
+
+A ticker coroutine sleeps for --tick-ms in a loop; the amount by which each
+wake-up overshoots is the latency every other request would have seen.
+"""
+import argparse
+import asyncio
+import statistics
+import time
+
+from passlib.context import CryptContext
+
+from src.auth.hashing import PasswordHasher
+import src.auth.hashing as hashing
+
+
+async def measure(storm, tick_seconds: float) -> dict:
+    lags = []
+    done = asyncio.Event()
+
+    async def ticker():
+        while not done.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(tick_seconds)
+            lags.append(time.perf_counter() - started - tick_seconds)
+
+    ticker_task = asyncio.create_task(ticker())
+    await asyncio.sleep(tick_seconds * 5)
+    started = time.perf_counter()
+    await storm()
+    elapsed = time.perf_counter() - started
+    done.set()
+    await ticker_task
+
+    lags.sort()
+    return {
+        "elapsed_s": round(elapsed, 3),
+        "loop_lag_p50_ms": round(statistics.median(lags) * 1000, 2),
+        "loop_lag_p99_ms": round(lags[int(len(lags) * 0.99) - 1] * 1000, 2),
+        "loop_lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def run(args):
+    context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=args.rounds)
+    hashing.passwd_context = context
+    stored_hash = context.hash("correct horse battery staple")
+
+    async def inline_storm():
+        async def login():
+            context.verify("correct horse battery staple", stored_hash)
+        await asyncio.gather(*(login() for _ in range(args.logins)))
+
+    hasher = PasswordHasher(max_workers=args.workers, max_pending=args.logins)
+
+    async def pooled_storm():
+        await asyncio.gather(*(
+            hasher.verify_and_update("correct horse battery staple", stored_hash)
+            for _ in range(args.logins)
+        ))
+
+    tick_seconds = args.tick_ms / 1000
+    print("inline:", await measure(inline_storm, tick_seconds))
+    print("pooled:", await measure(pooled_storm, tick_seconds))
+    print("hasher:", hasher.stats())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--logins", type=int, default=50)
+    parser.add_argument("--rounds", type=int, default=12)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--tick-ms", type=float, default=5)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
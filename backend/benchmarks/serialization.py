@@ -0,0 +1,81 @@
+"""
+Micro-benchmark: serialize a page of 1k events the old way (validate into
+models, then FastAPI's response_model re-validation and JSON encoding) against
+the lean path (plain documents straight to orjson).
+
+    python -m benchmarks.serialization --events 1000 --repeat 50
+"""
+import argparse
+import json
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+
+from src.db.models import EventSummary
+from src.db.serialization import defaults_for, dumps, lean
+from src.events.schemas import EventPage
+
+
+def make_documents(count: int) -> list[dict]:
+    now = datetime.now()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Event {i}",
+            "type": "concert",
+            "location": "Dhaka",
+            "date": now + timedelta(hours=i),
+            "general_price": 10.0,
+            "vip_price": 50.0,
+            "general_attendee_count": i,
+            "vip_attendee_count": i // 10,
+        }
+        for i in range(count)
+    ]
+
+
+def model_path(docs: list[dict]) -> bytes:
+    # What the route did before: build models, then FastAPI validates the
+    # returned value against response_model and JSON-encodes the result
+    page = {"events": [EventSummary(**doc) for doc in docs], "next_cursor": None}
+    validated = EventPage.model_validate(page)
+    return json.dumps(jsonable_encoder(validated), separators=(",", ":")).encode()
+
+
+def lean_path(docs: list[dict], defaults: dict) -> bytes:
+    return dumps({"events": lean(docs, defaults), "next_cursor": None})
+
+
+def bench(fn, repeat: int) -> dict:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - started)
+    return {"median_ms": round(statistics.median(timings) * 1000, 3), "min_ms": round(min(timings) * 1000, 3)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    docs = make_documents(args.events)
+    defaults = defaults_for(EventSummary)
+
+    before = bench(lambda: model_path(docs), args.repeat)
+    after = bench(lambda: lean_path(docs, defaults), args.repeat)
+    print(f"models + response_model: {before}")
+    print(f"lean orjson:             {after}")
+    print(f"speedup:                 {before['median_ms'] / after['median_ms']:.1f}x")
+
+    # Same payload either way
+    assert json.loads(model_path(docs)) == json.loads(lean_path(docs, defaults))
+
+
+if __name__ == "__main__":
+    main()
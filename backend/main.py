@@ -1,9 +1,30 @@
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
+from src.admin.routes import admin_router
 from src.auth.routes import auth_router
+from src.checkin.routes import checkin_router
 from src.events.routes import events_router
 from src.payments.routes import payments_router
 from src.errors import register_all_errors
 from fastapi.middleware.cors import CORSMiddleware
+from src.db.indexes import ensure_indexes, index_report
+from src.db.main import DATABASE_NAME, create_client, pool_monitor
+from src.events.cache import event_list_cache
+from src.events.rendering import ticket_renderer
+from src.auth.hashing import password_hasher
+from src.auth.utils import token_cache
+from src.logger import setup_logging
+from src.metrics import MetricsMiddleware, registry
+from src.middleware import RequestIdMiddleware
+from src.payments.stripe_client import create_stripe_client
+from src.services import create_services
+from src.config import Config
+
+log_listener = setup_logging()
+logger = logging.getLogger(__name__)
 
 version = "v1"
 
@@ -13,12 +34,37 @@ A REST API for a event management app
 
 version_prefix =f"/api/{version}"
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # One client, and so one connection pool, per worker process
+    client = create_client()
+    db = client[DATABASE_NAME]
+    app.state.db = db
+    app.state.services = services = create_services(db, create_stripe_client())
+    registry.register_collector("app_fulfillment", services.fulfillment.stats)
+
+    await ensure_indexes(db)
+    report = await index_report(db)
+    if report["uncovered"]:
+        logger.warning("Queries without index support: %s", report["uncovered"])
+    await services.jobs.start(workers=Config.RUN_JOB_WORKERS)
+    await services.revocations.start()
+    yield
+    await services.jobs.stop()
+    client.close()
+    await services.close()
+    ticket_renderer.shutdown()
+    log_listener.stop()
+
 app = FastAPI(
     title="Event Management App",
     description=description,
     version=version,
+    lifespan=lifespan,
 )
 
+register_all_errors(app)
+
 app.add_middleware(
         CORSMiddleware,
         allow_origins=["*"],
@@ -26,7 +72,21 @@ app.add_middleware(
         allow_headers=["*"],
         allow_credentials=True,
     )
+app.add_middleware(RequestIdMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+registry.register_collector("app_token_cache", token_cache.stats)
+registry.register_collector("app_password_hasher", password_hasher.stats)
+registry.register_collector("app_ticket_renderer", ticket_renderer.stats)
+registry.register_collector("app_event_list_cache", event_list_cache.stats)
+registry.register_collector("app_mongo_pool", pool_monitor.stats)
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
 
 app.include_router(auth_router, prefix=f"{version_prefix}/auth", tags=["auth"])
 app.include_router(events_router, prefix=f"{version_prefix}/event", tags=["event"])
-app.include_router(payments_router, prefix=f"{version_prefix}/payments", tags=["payments"])
\ No newline at end of file
+app.include_router(payments_router, prefix=f"{version_prefix}/payments", tags=["payments"])
+app.include_router(checkin_router, prefix=f"{version_prefix}/checkin", tags=["checkin"])
+app.include_router(admin_router, prefix=f"{version_prefix}/admin", tags=["admin"])
\ No newline at end of file
@@ -0,0 +1,56 @@
+from fastapi import APIRouter, Depends
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.auth.dependencies import RoleChecker
+from src.auth.hashing import password_hasher
+from src.auth.utils import token_cache
+from src.db.indexes import index_report
+from src.db.main import get_db, pool_monitor
+from src.events.rendering import ticket_renderer
+from src.jobs.queue import JobQueue
+from src.payments.fulfillment import PaymentFulfillment
+from src.payments.stripe_service import StripeService
+from src.services import get_job_queue, get_payment_fulfillment, get_stripe_service
+
+admin_router = APIRouter(dependencies=[Depends(RoleChecker(["admin"]))])
+
+@admin_router.get("/indexes")
+async def get_index_report(db: AsyncIOMotorDatabase = Depends(get_db)):
+    """
+    Run explain() on every query shape the services issue and list the ones
+    that fall back to a collection scan.
+    """
+    return await index_report(db)
+
+@admin_router.get("/db-pool")
+async def get_db_pool_stats():
+    """
+    Connection pool utilization of this worker's MongoDB client, per server.
+    """
+    return pool_monitor.stats()
+
+@admin_router.get("/token-cache")
+async def get_token_cache_stats():
+    return token_cache.stats()
+
+@admin_router.get("/password-hasher")
+async def get_password_hasher_stats():
+    return password_hasher.stats()
+
+@admin_router.get("/stripe")
+async def get_stripe_client_stats(stripe_service: StripeService = Depends(get_stripe_service)):
+    return stripe_service.client.stats()
+
+@admin_router.get("/fulfillment")
+async def get_fulfillment_stats(fulfillment: PaymentFulfillment = Depends(get_payment_fulfillment)):
+    return fulfillment.stats()
+
+@admin_router.get("/jobs")
+async def get_job_queue_stats(jobs: JobQueue = Depends(get_job_queue)):
+    """Queue depth, oldest due job and running attempts per job kind."""
+    await jobs.refresh_depth()
+    return jobs.stats()
+
+@admin_router.get("/ticket-renderer")
+async def get_ticket_renderer_stats():
+    return ticket_renderer.stats()
@@ -5,8 +5,7 @@ from fastapi.exceptions import HTTPException
 from fastapi.security import HTTPBearer
 from fastapi.security.http import HTTPAuthorizationCredentials
 
-from src.db.main import get_db
-from ..db.models import User
+from src.services import get_user_service
 
 from .service import UserService
 from .utils import decode_token
@@ -27,11 +26,9 @@ class TokenBearer(HTTPBearer):
 
         token = creds.credentials
 
-        print(f"Token: {token}")
-
         token_data = decode_token(token)
 
-        if not self.token_valid(token):
+        if token_data is None:
             raise InvalidToken()
 
         self.verify_token_data(token_data)
@@ -56,6 +53,8 @@ class AccessTokenFromCookie:
             raise InvalidToken("Access token not found in cookies")
 
         token_data = decode_token(token)
+        if token_data is None:
+            raise InvalidToken()
 
         if token_data.get("refresh"):  # if it's a refresh token used where access is needed
             raise AccessTokenRequired()
@@ -72,6 +71,8 @@ class RefreshTokenFromCookie:
             raise InvalidToken("Refresh token not found in cookies")
 
         token_data = decode_token(token)
+        if token_data is None:
+            raise InvalidToken()
 
         if token_data.get("access"):  # if it's a refresh token used where access is needed
             raise RefreshTokenRequired()
@@ -79,12 +80,16 @@ class RefreshTokenFromCookie:
         return token_data
 
 async def get_current_user_with_cookie(
+    request: Request,
     token_details: dict = Depends(AccessTokenFromCookie()),
-    db = Depends(get_db),
+    user_service: UserService = Depends(get_user_service),
 ):
-    print(f"Token details from cookie: {token_details}")
+    # Resolve the user at most once per request, whichever dependency asks first
+    user = getattr(request.state, "user", None)
+    if user is not None:
+        return user
+
     user_email = token_details["user"]["email"]
-    user_service = UserService(db)
     user = await user_service.get_user_by_email(user_email)
 
     if not user:
@@ -93,14 +98,37 @@ async def get_current_user_with_cookie(
             detail="User not found",
         )
 
+    request.state.user = user
     return user
 
+async def get_token_claims(token_details: dict = Depends(AccessTokenFromCookie())) -> dict:
+    """User claims from the verified access token, without touching the database."""
+    return token_details["user"]
+
 class RoleChecker:
-    def __init__(self, allowed_roles: List[str]) -> None:
-        self.allowed_roles = allowed_roles
+    """
+    With from_claims=True the role is read from the access token instead of the
+    user document, so authorization costs no database call. Role changes then
+    apply once the user's current access token expires.
+    """
 
-    def __call__(self, current_user: User = Depends(get_current_user_with_cookie)) -> Any:
-        if current_user.role in self.allowed_roles:
+    def __init__(self, allowed_roles: List[str], from_claims: bool = False) -> None:
+        self.allowed_roles = allowed_roles
+        self.from_claims = from_claims
+
+    async def __call__(
+        self,
+        request: Request,
+        token_details: dict = Depends(AccessTokenFromCookie()),
+        user_service: UserService = Depends(get_user_service),
+    ) -> Any:
+        role = token_details["user"].get("role") if self.from_claims else None
+        if role is None:
+            # Tokens minted by /refresh_token carry no role claim
+            current_user = await get_current_user_with_cookie(request, token_details, user_service)
+            role = current_user.role
+
+        if role in self.allowed_roles:
             return True
 
-        raise InsufficientPermission()
\ No newline at end of file
+        raise InsufficientPermission()
@@ -0,0 +1,83 @@
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+from src.config import Config
+from src.errors import PasswordHashingBusy
+
+from .utils import passwd_context
+
+
+class PasswordHasher:
+    """
+    Runs bcrypt in a bounded thread pool so hashing never blocks the event loop.
+    bcrypt releases the GIL, so threads give real parallelism here. At most
+    `max_workers` hashes run at once and at most `max_pending` wait for a slot;
+    beyond that callers get PasswordHashingBusy instead of an ever-growing queue.
+    """
+
+    def __init__(self, max_workers: int, max_pending: int):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="bcrypt")
+        self._slots = asyncio.Semaphore(max_workers)
+        self.queued = 0
+        self.running = 0
+        self.completed = 0
+        self.rejected = 0
+        self.wait_seconds = 0.0
+        self.work_seconds = 0.0
+
+    async def _run(self, fn, *args):
+        if self.queued >= self.max_pending:
+            self.rejected += 1
+            raise PasswordHashingBusy()
+
+        self.queued += 1
+        enqueued = time.perf_counter()
+        try:
+            await self._slots.acquire()
+        finally:
+            self.queued -= 1
+
+        started = time.perf_counter()
+        self.wait_seconds += started - enqueued
+        self.running += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._executor, fn, *args)
+        finally:
+            self.running -= 1
+            self.completed += 1
+            self.work_seconds += time.perf_counter() - started
+            self._slots.release()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(passwd_context.hash, password)
+
+    async def verify_and_update(self, password: str, hash: str) -> tuple[bool, Optional[str]]:
+        """
+        Returns (valid, new_hash). new_hash is set when the stored hash was made
+        with a different work factor than BCRYPT_ROUNDS and should be replaced.
+        """
+        return await self._run(passwd_context.verify_and_update, password, hash)
+
+    def stats(self) -> dict:
+        return {
+            "max_workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "queued": self.queued,
+            "running": self.running,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "avg_wait_ms": self.wait_seconds / self.completed * 1000 if self.completed else 0.0,
+            "avg_work_ms": self.work_seconds / self.completed * 1000 if self.completed else 0.0,
+            "rounds": Config.BCRYPT_ROUNDS,
+        }
+
+
+password_hasher = PasswordHasher(
+    max_workers=Config.PASSWORD_HASH_WORKERS,
+    max_pending=Config.PASSWORD_HASH_MAX_PENDING,
+)
@@ -0,0 +1,86 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from pymongo.errors import DuplicateKeyError
+
+from src.config import Config
+from src.errors import RevokedToken
+
+from .token_cache import TokenCache
+from .utils import decode_token
+
+logger = logging.getLogger(__name__)
+
+# Re-read this far back on every poll, so clock skew between processes cannot hide a revocation
+SYNC_OVERLAP = timedelta(seconds=60)
+
+
+class TokenRevocations:
+    """
+    Token revocations shared between processes through `revoked_tokens`,
+    one document per jti that a TTL index drops once the token has expired.
+
+    A revocation applies at once in the process that made it. Every other
+    process polls the collection and marks new jtis revoked in its own
+    TokenCache, so there a logged-out token stops working within
+    TOKEN_REVOCATION_SYNC_SECONDS.
+    """
+
+    def __init__(self, db, cache: TokenCache):
+        self.revoked = db["revoked_tokens"]
+        self.cache = cache
+        self._synced_at: Optional[datetime] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def revoke(self, token: str) -> None:
+        try:
+            token_data = decode_token(token)
+        except RevokedToken:
+            return
+        if token_data is None:
+            return
+
+        self.cache.revoke(token, token_data)
+        if not token_data.get("jti"):
+            return
+        try:
+            await self.revoked.insert_one({
+                "_id": token_data["jti"],
+                "expires_at": datetime.utcfromtimestamp(token_data["exp"]),
+                "revoked_at": datetime.utcnow(),
+            })
+        except DuplicateKeyError:
+            pass
+
+    async def sync(self) -> int:
+        now = datetime.utcnow()
+        query = {"expires_at": {"$gt": now}}
+        if self._synced_at is not None:
+            query["revoked_at"] = {"$gte": self._synced_at - SYNC_OVERLAP}
+
+        synced = 0
+        async for doc in self.revoked.find(query, {"expires_at": 1}):
+            self.cache.mark_revoked(doc["_id"], (doc["expires_at"] - datetime(1970, 1, 1)).total_seconds())
+            synced += 1
+        self._synced_at = now
+        return synced
+
+    async def start(self):
+        await self.sync()
+        self._task = asyncio.create_task(self._poll())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _poll(self):
+        while True:
+            await asyncio.sleep(Config.TOKEN_REVOCATION_SYNC_SECONDS)
+            try:
+                await self.sync()
+            except Exception:
+                logger.exception("Could not sync token revocations")
@@ -1,13 +1,14 @@
+import logging
 from datetime import datetime, timedelta
+from typing import Literal
 
-from fastapi import APIRouter, Depends, status, BackgroundTasks, Response
+from fastapi import APIRouter, Depends, Query, Request, status, Response
 from fastapi.exceptions import HTTPException
 from fastapi.responses import JSONResponse
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from fastapi.responses import StreamingResponse
 
-from src.db.main import get_db
 from src.events.service import EventService
+from src.services import get_event_service, get_token_revocations, get_user_service
 
 from .dependencies import (
     RefreshTokenFromCookie,
@@ -22,10 +23,13 @@ from .schemas import (
 from .service import UserService
 from .utils import (
     create_access_token,
-    verify_password,
 )
+from .hashing import password_hasher
+from .revocations import TokenRevocations
 from src.errors import UserAlreadyExists, InvalidCredentials, InvalidToken
 
+logger = logging.getLogger(__name__)
+
 auth_router = APIRouter()
 role_checker = RoleChecker(["admin", "user"])
 
@@ -34,16 +38,13 @@ REFRESH_TOKEN_EXPIRY = 2
 @auth_router.post("/signup", status_code=status.HTTP_201_CREATED, response_model=UserResponseModel)
 async def create_user_account(
     user_data: UserCreateModel,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    user_service: UserService = Depends(get_user_service),
 ):
     """
     Create user account using email, password, first_name, last_name
     params:
         user_data: UserCreateModel
     """
-    print(f"Creating user account for {user_data.email}")
-    user_service = UserService(db)
-    print(f"User service created")
     email = user_data.email
 
     user_exists = await user_service.user_exists(email)
@@ -52,7 +53,6 @@ async def create_user_account(
         raise UserAlreadyExists()
 
     new_user = await user_service.create_user(user_data)
-    print(new_user)
 
     return UserResponseModel(
         id=str(new_user.id),
@@ -66,21 +66,21 @@ async def create_user_account(
 async def login_users(
     login_data: UserLoginModel,
     response: Response,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    user_service: UserService = Depends(get_user_service),
 ):
     email = login_data.email
     password = login_data.password
 
-    print(f"Logging in user with email: {email}")
-
-    user_service = UserService(db)
     user = await user_service.get_user_by_email(email)
 
     if user is not None:
-        print(f"User found: {user.email}")
-        password_valid = verify_password(password, user.password_hash)
+        password_valid, new_hash = await password_hasher.verify_and_update(password, user.password_hash)
 
         if password_valid:
+            if new_hash:
+                # BCRYPT_ROUNDS changed since this hash was stored
+                await user_service.update_password_hash(user.id, new_hash)
+
             access_token = create_access_token(
                 user_data={
                     "email": user.email,
@@ -112,6 +112,7 @@ async def login_users(
                 max_age=60 * 60 * 24 * 2,  # 2 days
             )
 
+            logger.info("Login succeeded", extra={"user_id": str(user.id)})
             return {
                     "message": "Login successful",
                     "access_token": access_token,
@@ -119,40 +120,44 @@ async def login_users(
                     "user": {"email": user.email, "uid": str(user.id)},
                 }
 
+    logger.info("Login failed")
     raise InvalidCredentials()
 
 @auth_router.get("/me")
 async def get_current_user_details(
     user=Depends(get_current_user_with_cookie),
-    db: AsyncIOMotorDatabase = Depends(get_db),
 ):
-    user_service = UserService(db)
-    user_details = await user_service.get_user_by_id(user.id)
-    return user_details
+    return user
 
 @auth_router.get("/me/events")
 async def get_user_events(
     user=Depends(get_current_user_with_cookie),
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0),
+    sort: Literal["date", "-date", "ticket"] = Query("date"),
 ):
-    user_service = UserService(db)
-    user_details = await user_service.get_user_by_id(user.id)
-    user_events = []
-    event_service = EventService(db)
-
-    for event_id in user_details.tickets:
-        event = await event_service.get_event_by_id(event_id)
-        user_events.append(event)
-
-    return user_events
+    if sort == "ticket":
+        # In the order the tickets were issued: one $in over just this page's ids
+        event_ids = list(user.tickets)
+        events = await event_service.get_events_by_ids(event_ids[offset:offset + limit])
+        next_offset = offset + limit if len(event_ids) > offset + limit else None
+        return {"events": events, "next_offset": next_offset}
+
+    return await event_service.get_events_page_by_ids(
+        list(user.tickets), limit=limit, offset=offset, descending=sort == "-date"
+    )
 
 @auth_router.get("/me/events/{event_id}/ticket")
 async def get_user_event_ticket(
     event_id: str,
     user=Depends(get_current_user_with_cookie),
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    user_service: UserService = Depends(get_user_service),
 ):
-    user_service = UserService(db)
+    if event_id not in user.tickets:
+        # Not registered, or the ticket is still being issued
+        raise HTTPException(status_code=404, detail="Ticket not found")
+
     try:
         ticket_pdf = await user_service.save_user_ticket(user.id, event_id)
     except Exception as e:
@@ -167,7 +172,16 @@ async def get_user_event_ticket(
     )
 
 @auth_router.get("/logout")
-async def logout(response: Response):
+async def logout(
+    request: Request,
+    response: Response,
+    revocations: TokenRevocations = Depends(get_token_revocations),
+):
+    for cookie in ("access_token", "refresh_token"):
+        token = request.cookies.get(cookie)
+        if token:
+            await revocations.revoke(token)
+
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
     return {"message": "Logged out"}
@@ -1,26 +1,24 @@
 import logging
-from motor.motor_asyncio import AsyncIOMotorDatabase
 from bson import ObjectId
 
 from src.db.models import User
 
 from .schemas import UserCreateModel
-from .utils import generate_passwd_hash
-from src.events.utils import TicketService
+from .hashing import password_hasher
+from src.events.rendering import ticket_renderer
+
+logger = logging.getLogger(__name__)
 
 class UserService:
     def __init__(self, db):
         self.db = db
         self.users = db["users"]  # MongoDB collection
-        print("User collection initialized")
 
     async def get_user_by_email(self, email: str):
-        print(f"Attempting to find user with email: {email}")
         user = await self.users.find_one({"email": email})
         if user:
-            print(f"User found: {email}")
             return User(**user)
-        print(f"No user found with email: {email}")
+        logger.debug("No user found with email %s", email)
         return None
     
     async def get_user_by_id(self, user_id: str):
@@ -33,29 +31,39 @@ class UserService:
         user = await self.get_user_by_id(user_id)
         try:
             ticket_token = user.tickets[event_id]
-            ticket_service = TicketService()
-            ticket_pdf = ticket_service.generate_ticket_and_save(ticket_token)
+            ticket_pdf = await ticket_renderer.render_stream(ticket_token)
             return ticket_pdf
         except Exception as e:
             raise
 
+    async def add_ticket(self, user_id: str, event_id: str, ticket_token: str):
+        await self.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {f"tickets.{event_id}": ticket_token}},
+        )
+
+    async def update_password_hash(self, user_id: str, password_hash: str):
+        await self.users.update_one(
+            {"_id": ObjectId(user_id)},
+            {"$set": {"password_hash": password_hash}},
+        )
+
     async def user_exists(self, email: str):
         exists = await self.get_user_by_email(email) is not None
         return exists
 
     async def create_user(self, user_data: UserCreateModel):
         user_data_dict = user_data.model_dump()
-        user_data_dict["password_hash"] = generate_passwd_hash(user_data_dict["password"])
+        user_data_dict["password_hash"] = await password_hasher.hash(user_data_dict["password"])
         user_data_dict["role"] = "user"
         
         # Remove the password field as we only store the hash
         del user_data_dict["password"]
         
         try:
-            print(user_data_dict)
             result = await self.users.insert_one(user_data_dict)
             user_data_dict["_id"] = result.inserted_id
-            print(f"User created successfully: {user_data.email}")
+            logger.info("User created", extra={"user_id": str(result.inserted_id)})
             return User(**user_data_dict)
         except Exception as e:
             raise
@@ -71,7 +79,7 @@ class UserService:
         
         # If password is being updated, hash it
         if "password" in user_data:
-            user_dict["password_hash"] = generate_passwd_hash(user_data["password"])
+            user_dict["password_hash"] = await password_hasher.hash(user_data["password"])
         
         try:
             # Update in MongoDB
@@ -0,0 +1,87 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class TokenCache:
+    """
+    Bounded LRU of verified JWT payloads keyed by the token's SHA-256 digest.
+    An entry is never served past the token's own `exp`, and revoked tokens are
+    evicted and remembered (by jti) until they would have expired anyway.
+    Revocations from other processes arrive through mark_revoked, see
+    src/auth/revocations.py; callers check is_revoked on hits as well.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self._entries: OrderedDict[bytes, tuple[dict, float]] = OrderedDict()
+        self._revoked: dict[str, float] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> Optional[dict]:
+        key = self._key(token)
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        payload, expires_at = entry
+        if expires_at <= time.time():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return payload
+
+    def put(self, token: str, payload: dict) -> None:
+        expires_at = payload.get("exp")
+        if expires_at is None:
+            return
+
+        key = self._key(token)
+        self._entries[key] = (payload, float(expires_at))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def evict(self, token: str) -> None:
+        self._entries.pop(self._key(token), None)
+
+    def revoke(self, token: str, payload: dict) -> None:
+        self.evict(token)
+        if payload.get("jti"):
+            self.mark_revoked(payload["jti"], float(payload.get("exp", time.time())))
+
+    def mark_revoked(self, jti: str, expires_at: float) -> None:
+        self._revoked[jti] = expires_at
+        self._prune_revoked()
+
+    def is_revoked(self, payload: dict) -> bool:
+        return payload.get("jti") in self._revoked
+
+    def _prune_revoked(self) -> None:
+        now = time.time()
+        for jti in [jti for jti, expires_at in self._revoked.items() if expires_at <= now]:
+            del self._revoked[jti]
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+            "evictions": self.evictions,
+            "revoked": len(self._revoked),
+        }
@@ -7,21 +7,18 @@ import jwt
 from passlib.context import CryptContext
 
 from src.config import Config
+from src.errors import RevokedToken
 
-passwd_context = CryptContext(schemes=["bcrypt"])
+from .token_cache import TokenCache
 
-
-ACCESS_TOKEN_EXPIRY = 3600
+passwd_context = CryptContext(schemes=["bcrypt"], bcrypt__rounds=Config.BCRYPT_ROUNDS)
 
 
-def generate_passwd_hash(password: str) -> str:
-    hash = passwd_context.hash(password)
-
-    return hash
+logger = logging.getLogger(__name__)
 
+ACCESS_TOKEN_EXPIRY = 3600
 
-def verify_password(password: str, hash: str) -> bool:
-    return passwd_context.verify(password, hash)
+token_cache = TokenCache(max_size=Config.TOKEN_CACHE_SIZE)
 
 
 def create_access_token(
@@ -45,16 +42,25 @@ def create_access_token(
 
 
 def decode_token(token: str) -> dict:
-    try:
-        token_data = jwt.decode(
-            jwt=token, key=Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM]
-        )
-
-        return token_data
-
-    except jwt.PyJWTError as e:
-        logging.exception(e)
-        return None
+    # Repeat requests from the same session skip signature verification
+    token_data = token_cache.get(token)
+    if token_data is None:
+        try:
+            token_data = jwt.decode(
+                jwt=token, key=Config.JWT_SECRET, algorithms=[Config.JWT_ALGORITHM]
+            )
+
+        except jwt.PyJWTError as e:
+            logger.info("Rejected token: %s", e)
+            return None
+
+        if not token_cache.is_revoked(token_data):
+            token_cache.put(token, token_data)
+
+    # Also on hits: another process may have revoked a token cached here
+    if token_cache.is_revoked(token_data):
+        raise RevokedToken()
+    return token_data
 
 serializer = URLSafeTimedSerializer(
     secret_key=Config.JWT_SECRET, salt="email-configuration"
@@ -73,5 +79,5 @@ def decode_url_safe_token(token:str):
         return token_data
     
     except Exception as e:
-        logging.error(str(e))
+        logger.warning("Rejected url-safe token: %s", e)
         
\ No newline at end of file
@@ -0,0 +1,35 @@
+from typing import List
+
+from fastapi import APIRouter, Depends
+
+from src.auth.dependencies import RoleChecker
+from src.services import get_checkin_service
+
+from .schemas import ReplayBatch, ScanBatch, ScanResult
+from .service import CheckInService
+
+checkin_router = APIRouter(dependencies=[Depends(RoleChecker(["admin"], from_claims=True))])
+
+@checkin_router.post("/{event_id}/scan", response_model=List[ScanResult])
+async def scan_tickets(
+    event_id: str,
+    batch: ScanBatch,
+    checkin_service: CheckInService = Depends(get_checkin_service),
+):
+    return await checkin_service.scan_batch(event_id, batch.tokens, batch.scanner_id, batch.batch_id)
+
+@checkin_router.post("/{event_id}/replay", response_model=List[ScanResult])
+async def replay_offline_scans(
+    event_id: str,
+    batch: ReplayBatch,
+    checkin_service: CheckInService = Depends(get_checkin_service),
+):
+    scans = [(scan.token, scan.scanned_at) for scan in batch.scans]
+    return await checkin_service.replay(event_id, scans, batch.scanner_id, batch.batch_id)
+
+@checkin_router.get("/{event_id}/stats")
+async def get_checkin_stats(
+    event_id: str,
+    checkin_service: CheckInService = Depends(get_checkin_service),
+):
+    return await checkin_service.get_stats(event_id)
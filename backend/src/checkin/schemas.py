@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import List, Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ScanBatch(BaseModel):
+    tokens: List[str] = Field(min_length=1, max_length=1000)
+    scanner_id: Optional[str] = None
+    # Sent again unchanged when a scanner retries the batch, so its own admissions come back as admitted
+    batch_id: Optional[str] = Field(None, max_length=64)
+
+class OfflineScan(BaseModel):
+    token: str
+    scanned_at: datetime
+
+class ReplayBatch(BaseModel):
+    scans: List[OfflineScan] = Field(min_length=1, max_length=5000)
+    scanner_id: Optional[str] = None
+    batch_id: Optional[str] = Field(None, max_length=64)
+
+class ScanResult(BaseModel):
+    # "error": the check-in could not be stored; scan the ticket again
+    status: Literal["admitted", "duplicate", "invalid", "wrong_event", "error"]
+    ticket_id: Optional[str] = None
+    ticket_type: Optional[str] = None
+    holder: Optional[str] = None
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo.errors import BulkWriteError
+
+from src.events.utils import TicketService
+
+from .schemas import ScanResult
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+def _naive_utc(value: datetime) -> datetime:
+    # Scanners may send offsets or not; stored and compared times are naive UTC
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+class CheckInService:
+    """
+    Admits scanned tickets at the gate. Each process keeps the set of admitted
+    ticket_ids per event in memory so repeat scans are rejected without a
+    database round trip; new admissions are persisted with one unordered bulk
+    insert per batch, and the unique (event_id, ticket_id) index settles races
+    between workers.
+
+    Check-ins a scanner stored under a batch_id are reported as admitted again
+    when the same scanner retries that batch, so a lost response does not turn
+    the attendee away as a duplicate.
+    """
+
+    _admitted: dict[str, set[str]] = {}
+    _loading: dict[str, asyncio.Lock] = {}
+
+    def __init__(self, db):
+        self.db = db
+        self.checkins = db["checkins"]
+        self.ticket_service = TicketService()
+
+    async def _admitted_for(self, event_id: str) -> set[str]:
+        admitted = self._admitted.get(event_id)
+        if admitted is not None:
+            return admitted
+
+        lock = self._loading.setdefault(event_id, asyncio.Lock())
+        async with lock:
+            if event_id not in self._admitted:
+                cursor = self.checkins.find({"event_id": ObjectId(event_id)}, {"ticket_id": 1, "_id": 0})
+                self._admitted[event_id] = {doc["ticket_id"] async for doc in cursor}
+        return self._admitted[event_id]
+
+    def _decode(self, token: str) -> Optional[dict]:
+        try:
+            return self.ticket_service.verify_ticket_token(token)
+        except HTTPException:
+            return None
+
+    async def scan(
+        self, event_id: str, scans: list[tuple[str, datetime]], scanner_id: Optional[str] = None, batch_id: Optional[str] = None
+    ) -> list[ScanResult]:
+        admitted = await self._admitted_for(event_id)
+        results: list[ScanResult] = []
+        new_checkins, positions, batch = [], [], set()
+        # Positions reported duplicate because the ticket was admitted before this batch
+        repeats = []
+        now = datetime.utcnow()
+
+        for token, scanned_at in scans:
+            ticket = self._decode(token)
+            if ticket is None:
+                results.append(ScanResult(status="invalid"))
+                continue
+
+            result = ScanResult(
+                status="admitted",
+                ticket_id=ticket["ticket_id"],
+                ticket_type=ticket["ticket_type"],
+                holder=f"{ticket['first_name']} {ticket['last_name']}",
+            )
+            if ticket["event_id"] != event_id:
+                result.status = "wrong_event"
+            elif ticket["ticket_id"] in batch:
+                result.status = "duplicate"
+            elif ticket["ticket_id"] in admitted:
+                result.status = "duplicate"
+                repeats.append(len(results))
+            else:
+                batch.add(ticket["ticket_id"])
+                positions.append(len(results))
+                new_checkins.append({
+                    "event_id": ObjectId(event_id),
+                    "ticket_id": ticket["ticket_id"],
+                    "user_id": ticket["user_id"],
+                    "ticket_type": ticket["ticket_type"],
+                    "scanned_at": scanned_at or now,
+                    "recorded_at": now,
+                    "scanner_id": scanner_id,
+                    "batch_id": batch_id,
+                })
+            results.append(result)
+
+        # Tickets only join the admitted set once their check-in is stored, so a
+        # failed write leaves them scannable again
+        if new_checkins:
+            try:
+                await self.checkins.insert_many(new_checkins, ordered=False)
+            except BulkWriteError as e:
+                for error in e.details["writeErrors"]:
+                    position = positions[error["index"]]
+                    if error["code"] == DUPLICATE_KEY:
+                        # Another worker admitted this ticket first, or this batch did before a retry
+                        results[position].status = "duplicate"
+                        repeats.append(position)
+                    else:
+                        batch.discard(new_checkins[error["index"]]["ticket_id"])
+                        results[position].status = "error"
+            admitted.update(batch)
+
+        if repeats and batch_id is not None:
+            await self._readmit_retried(event_id, results, repeats, scanner_id, batch_id)
+
+        logger.info(
+            "Processed scan batch",
+            extra={"event_id": event_id, "scanner_id": scanner_id, "scans": len(results), "admitted": len(new_checkins)},
+        )
+        return results
+
+    async def _readmit_retried(
+        self, event_id: str, results: list[ScanResult], repeats: list[int], scanner_id: Optional[str], batch_id: str
+    ):
+        ticket_ids = [results[position].ticket_id for position in repeats]
+        cursor = self.checkins.find(
+            {"event_id": ObjectId(event_id), "ticket_id": {"$in": ticket_ids}, "scanner_id": scanner_id, "batch_id": batch_id},
+            {"ticket_id": 1, "_id": 0},
+        )
+        ours = {doc["ticket_id"] async for doc in cursor}
+        for position in repeats:
+            if results[position].ticket_id in ours:
+                results[position].status = "admitted"
+
+    async def scan_batch(
+        self, event_id: str, tokens: list[str], scanner_id: Optional[str] = None, batch_id: Optional[str] = None
+    ) -> list[ScanResult]:
+        return await self.scan(event_id, [(token, None) for token in tokens], scanner_id, batch_id)
+
+    async def replay(
+        self, event_id: str, scans: list[tuple[str, datetime]], scanner_id: Optional[str] = None, batch_id: Optional[str] = None
+    ) -> list[ScanResult]:
+        """
+        Apply scans recorded offline in the order they happened, so the earliest
+        scan of a ticket is the admission; results come back in request order.
+        """
+        scans = [(token, _naive_utc(scanned_at)) for token, scanned_at in scans]
+        order = sorted(range(len(scans)), key=lambda i: scans[i][1])
+        replayed = await self.scan(event_id, [scans[i] for i in order], scanner_id, batch_id)
+
+        results: list[Optional[ScanResult]] = [None] * len(scans)
+        for position, result in zip(order, replayed):
+            results[position] = result
+        return results
+
+    async def get_stats(self, event_id: str) -> dict:
+        admitted = await self.checkins.count_documents({"event_id": ObjectId(event_id)})
+        return {"event_id": event_id, "admitted": admitted}
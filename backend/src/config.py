@@ -1,12 +1,54 @@
+from typing import Optional
+
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 class Settings(BaseSettings):
     DATABASE_URL: str
+    MONGO_MAX_POOL_SIZE: int = 100
+    MONGO_MIN_POOL_SIZE: int = 0
+    MONGO_MAX_IDLE_TIME_MS: Optional[int] = None
+    MONGO_SERVER_SELECTION_TIMEOUT_MS: int = 5000
+    MONGO_COMPRESSORS: str = ""
     JWT_SECRET: str
     JWT_ALGORITHM: str
     STRIPE_SECRET_KEY: str
+    STRIPE_API_BASE: str = "https://api.stripe.com"
+    STRIPE_TIMEOUT_SECONDS: float = 10.0
+    STRIPE_MAX_RETRIES: int = 2
+    STRIPE_MAX_CONNECTIONS: int = 20
+    STRIPE_WEBHOOK_SECRET: str = ""
+    STRIPE_WEBHOOK_TOLERANCE_SECONDS: int = 300
+    PAYMENT_SUCCESS_URL: str = "http://localhost:8000/api/v1/payments/success"
+    PAYMENT_CANCEL_URL: str = "http://localhost:3000/cancel"
+    CHECKOUT_HOLD_SECONDS: int = 1860
+    HOLD_GRACE_SECONDS: int = 300
+    HOLD_REAPER_INTERVAL_SECONDS: int = 60
+    INVENTORY_SHARDS: int = 8
     TICKET_TOKEN_SECRET: str
     TICKET_TOKEN_ALGORITHM: str
+    TOKEN_CACHE_SIZE: int = 10000
+    TOKEN_REVOCATION_SYNC_SECONDS: float = 5.0
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_SAMPLE_RATES: str = ""
+    EVENT_CACHE_TTL_SECONDS: float = 30
+    EVENT_CACHE_MAX_ENTRIES: int = 1024
+    TICKET_CACHE_DIR: str = ".ticket_cache"
+    TICKET_CACHE_ITEMS: int = 1024
+    TICKET_CACHE_MAX_MB: int = 512
+    TICKET_RENDER_WORKERS: int = 2
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_PENDING: int = 256
+    RUN_JOB_WORKERS: bool = True
+    JOB_CONCURRENCY: str = ""
+    JOB_DEFAULT_CONCURRENCY: int = 4
+    JOB_POLL_INTERVAL_SECONDS: float = 1.0
+    JOB_VISIBILITY_TIMEOUT_SECONDS: float = 300
+    JOB_MAX_ATTEMPTS: int = 5
+    JOB_RETRY_BASE_SECONDS: float = 2.0
+    JOB_RETRY_MAX_SECONDS: float = 600
+    JOB_RETENTION_SECONDS: int = 7 * 24 * 3600
     model_config = SettingsConfigDict(env_file=".env", extra="ignore")
 
 Config = Settings()
@@ -0,0 +1,45 @@
+"""
+Populate the search_terms field used by event autocomplete on events created
+before it existed.
+
+    cd backend && python -m src.db.backfill_search_terms [--batch-size 1000]
+"""
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from src.db.indexes import ensure_indexes
+from src.db.main import DATABASE_NAME, create_client
+from src.events.search import search_terms
+
+
+async def backfill(db: AsyncIOMotorDatabase, batch_size: int = 1000):
+    await ensure_indexes(db)
+
+    operations = []
+    updated = 0
+    async for event in db["events"].find({"search_terms": {"$exists": False}}, {"name": 1, "location": 1}):
+        terms = search_terms(event.get("name", ""), event.get("location", ""))
+        operations.append(UpdateOne({"_id": event["_id"]}, {"$set": {"search_terms": terms}}))
+        if len(operations) >= batch_size:
+            await db["events"].bulk_write(operations, ordered=False)
+            updated += len(operations)
+            operations = []
+
+    if operations:
+        await db["events"].bulk_write(operations, ordered=False)
+        updated += len(operations)
+    print(f"Backfilled search terms for {updated} events")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(backfill(create_client()[DATABASE_NAME], args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,215 @@
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING, GEOSPHERE, TEXT, IndexModel
+from pymongo.errors import OperationFailure
+
+from src.config import Config
+
+logger = logging.getLogger(__name__)
+
+# Keyset sort used by the event listing, see EVENT_SORTS in src/events/service.py
+EVENT_DATE_SORT = [("date", ASCENDING), ("_id", ASCENDING)]
+
+INDEXES: dict[str, list[IndexModel]] = {
+    "users": [
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "events": [
+        IndexModel(EVENT_DATE_SORT, name="date_id"),
+        IndexModel([("type", ASCENDING), *EVENT_DATE_SORT], name="type_date_id"),
+        IndexModel([("location", ASCENDING), *EVENT_DATE_SORT], name="location_date_id"),
+        # Each branch of the price-range $or needs its own index
+        IndexModel([("general_price", ASCENDING)], name="general_price"),
+        IndexModel([("vip_price", ASCENDING)], name="vip_price"),
+        IndexModel(
+            [("name", TEXT), ("description", TEXT), ("location", TEXT)],
+            name="event_text",
+            weights={"name": 10, "location": 5, "description": 1},
+        ),
+        IndexModel([("search_terms", ASCENDING)], name="search_terms"),
+        # The date suffix lets "near me tonight" bound both distance and time in the index
+        IndexModel([("geo", GEOSPHERE), ("date", ASCENDING)], name="geo_date"),
+    ],
+    "registrations": [
+        IndexModel([("event_id", ASCENDING), ("user_id", ASCENDING)], name="event_user_unique", unique=True),
+        IndexModel([("user_id", ASCENDING)], name="user_id"),
+        # Keyset pagination of attendee lists, with and without a ticket type filter
+        IndexModel([("event_id", ASCENDING), ("_id", ASCENDING)], name="event_id_id"),
+        IndexModel([("event_id", ASCENDING), ("ticket_type", ASCENDING), ("_id", ASCENDING)], name="event_type_id"),
+    ],
+    "checkins": [
+        IndexModel([("event_id", ASCENDING), ("ticket_id", ASCENDING)], name="event_ticket_unique", unique=True),
+    ],
+    # Sharded seat counters; the fallback reservation looks for any shard with seats left
+    "inventory": [
+        IndexModel([("event_id", ASCENDING), ("ticket_type", ASCENDING), ("available", ASCENDING)], name="event_type_available"),
+    ],
+    "holds": [
+        # At most one live checkout hold per user and event
+        IndexModel(
+            [("event_id", ASCENDING), ("user_id", ASCENDING)],
+            name="event_user_held_unique",
+            unique=True,
+            partialFilterExpression={"status": "held"},
+        ),
+        IndexModel([("status", ASCENDING), ("expires_at", ASCENDING)], name="status_expires"),
+        IndexModel([("purge_at", ASCENDING)], name="purge_at_ttl", expireAfterSeconds=0),
+    ],
+    # Logged-out token ids, dropped once the token has expired anyway; polled by revoked_at
+    "revoked_tokens": [
+        IndexModel([("expires_at", ASCENDING)], name="expires_at_ttl", expireAfterSeconds=0),
+        IndexModel([("revoked_at", ASCENDING)], name="revoked_at"),
+    ],
+    # Job claims walk due jobs of one kind oldest first; finished jobs expire
+    "jobs": [
+        IndexModel([("kind", ASCENDING), ("status", ASCENDING), ("available_at", ASCENDING)], name="kind_status_available"),
+        IndexModel([("status", ASCENDING), ("kind", ASCENDING)], name="status_kind"),
+        IndexModel(
+            [("finished_at", ASCENDING)],
+            name="finished_at_ttl",
+            expireAfterSeconds=Config.JOB_RETENTION_SECONDS,
+            partialFilterExpression={"status": "done"},
+        ),
+    ],
+}
+
+
+@dataclass
+class QueryShape:
+    """A representative query issued by one of the services, used for explain() checks."""
+
+    name: str
+    collection: str
+    filter: dict
+    sort: Optional[list[tuple[str, int]]] = None
+    projection: Optional[dict] = None
+
+
+_PRICE_RANGE = {"$gte": 0, "$lte": 100}
+
+QUERY_SHAPES: list[QueryShape] = [
+    QueryShape("users.by_email", "users", {"email": "probe@example.com"}),
+    QueryShape("users.by_id", "users", {"_id": ObjectId()}),
+    QueryShape("events.by_id", "events", {"_id": ObjectId()}),
+    QueryShape("events.list", "events", {}, EVENT_DATE_SORT),
+    QueryShape("events.list_by_id", "events", {}, [("_id", ASCENDING)]),
+    QueryShape("events.list_by_type", "events", {"type": "probe"}, EVENT_DATE_SORT),
+    QueryShape("events.list_by_location", "events", {"location": "probe"}, EVENT_DATE_SORT),
+    # The date filter matches one calendar day, see event_filters in src/events/routes.py
+    QueryShape(
+        "events.list_by_date",
+        "events",
+        {"date": {"$gte": datetime(2000, 1, 1), "$lt": datetime(2000, 1, 2)}},
+        EVENT_DATE_SORT,
+    ),
+    QueryShape(
+        "events.list_by_price",
+        "events",
+        {"$or": [{"general_price": _PRICE_RANGE}, {"vip_price": _PRICE_RANGE}]},
+        EVENT_DATE_SORT,
+    ),
+    QueryShape("events.upcoming", "events", {"date": {"$gte": datetime(2000, 1, 1)}}, EVENT_DATE_SORT),
+    QueryShape(
+        "events.upcoming_by_type",
+        "events",
+        {"type": "probe", "date": {"$gte": datetime(2000, 1, 1), "$lte": datetime(2000, 2, 1)}},
+        EVENT_DATE_SORT,
+    ),
+    QueryShape(
+        "events.nearby",
+        "events",
+        {
+            "geo": {"$nearSphere": {"$geometry": {"type": "Point", "coordinates": [90.4, 23.8]}, "$maxDistance": 10000}},
+            "date": {"$gte": datetime(2000, 1, 1), "$lte": datetime(2000, 1, 2)},
+        },
+    ),
+    QueryShape("events.search", "events", {"$text": {"$search": "probe"}}),
+    QueryShape("events.search_by_type", "events", {"$text": {"$search": "probe"}, "type": "probe"}),
+    QueryShape("events.autocomplete", "events", {"search_terms": {"$regex": "^pro"}}, projection={"name": 1}),
+    QueryShape("registrations.by_event", "registrations", {"event_id": ObjectId()}, [("_id", ASCENDING)]),
+    QueryShape(
+        "registrations.by_event_type",
+        "registrations",
+        {"event_id": ObjectId(), "ticket_type": "VIP"},
+        [("_id", ASCENDING)],
+    ),
+    QueryShape("registrations.by_user", "registrations", {"user_id": ObjectId()}),
+    QueryShape("checkins.by_event", "checkins", {"event_id": ObjectId()}, projection={"ticket_id": 1, "_id": 0}),
+    QueryShape(
+        "inventory.any_shard",
+        "inventory",
+        {"event_id": ObjectId(), "ticket_type": "VIP", "available": {"$gt": 0}},
+    ),
+    QueryShape("holds.live_by_user", "holds", {"event_id": ObjectId(), "user_id": ObjectId(), "status": "held"}),
+    QueryShape("holds.expired", "holds", {"status": "held", "expires_at": {"$lt": datetime.now()}}),
+    QueryShape(
+        "jobs.claim",
+        "jobs",
+        {"kind": "probe", "status": {"$in": ["queued", "running"]}, "available_at": {"$lte": datetime.now()}},
+        [("available_at", ASCENDING)],
+    ),
+    QueryShape("jobs.depth", "jobs", {"status": {"$in": ["queued", "running", "failed"]}}),
+]
+
+
+async def ensure_indexes(db: AsyncIOMotorDatabase) -> None:
+    for collection, indexes in INDEXES.items():
+        try:
+            await db[collection].create_indexes(indexes)
+        except OperationFailure as e:
+            # e.g. duplicate emails already stored; keep serving, the report will show the gap
+            logger.error("Could not create indexes on %s: %s", collection, e)
+
+
+def _plan_stages(plan: dict) -> list[str]:
+    stages = [plan["stage"]] if "stage" in plan else []
+    if "inputStage" in plan:
+        stages += _plan_stages(plan["inputStage"])
+    for child in plan.get("inputStages", []):
+        stages += _plan_stages(child)
+    return stages
+
+
+async def explain_query(db: AsyncIOMotorDatabase, shape: QueryShape) -> dict:
+    cursor = db[shape.collection].find(shape.filter, shape.projection)
+    if shape.sort:
+        cursor = cursor.sort(shape.sort)
+
+    explanation = await cursor.limit(1).explain()
+    winning_plan = explanation["queryPlanner"]["winningPlan"]
+    # Slot-based engine nests the classic plan under "queryPlan"
+    stages = _plan_stages(winning_plan.get("queryPlan", winning_plan))
+
+    return {
+        "name": shape.name,
+        "collection": shape.collection,
+        "stages": stages,
+        "uses_index": "COLLSCAN" not in stages,
+        "in_memory_sort": "SORT" in stages,
+    }
+
+
+async def index_report(db: AsyncIOMotorDatabase) -> dict:
+    queries = []
+    for shape in QUERY_SHAPES:
+        try:
+            queries.append(await explain_query(db, shape))
+        except OperationFailure as e:
+            # $text and $nearSphere refuse to run at all without their index
+            queries.append({
+                "name": shape.name,
+                "collection": shape.collection,
+                "stages": [],
+                "uses_index": False,
+                "in_memory_sort": False,
+                "error": str(e),
+            })
+    return {
+        "queries": queries,
+        "uncovered": [q["name"] for q in queries if not q["uses_index"]],
+    }
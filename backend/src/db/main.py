@@ -1,9 +1,29 @@
+from fastapi import Request
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from src.config import Config
 
-# Create MongoDB client
-client = AsyncIOMotorClient(Config.DATABASE_URL)
-db: AsyncIOMotorDatabase = client["event_management_db"]
+from .pool import PoolMonitor
 
-async def get_db() -> AsyncIOMotorDatabase:
-    return db
+DATABASE_NAME = "event_management_db"
+
+pool_monitor = PoolMonitor(max_pool_size=Config.MONGO_MAX_POOL_SIZE)
+
+def create_client(**overrides) -> AsyncIOMotorClient:
+    """
+    Build the MongoDB client with the pool settings from Config. The app
+    creates one per process in its lifespan; CLI scripts call this directly.
+    """
+    options = {
+        "maxPoolSize": Config.MONGO_MAX_POOL_SIZE,
+        "minPoolSize": Config.MONGO_MIN_POOL_SIZE,
+        "maxIdleTimeMS": Config.MONGO_MAX_IDLE_TIME_MS,
+        "serverSelectionTimeoutMS": Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+        "event_listeners": [pool_monitor],
+    }
+    if Config.MONGO_COMPRESSORS:
+        options["compressors"] = Config.MONGO_COMPRESSORS
+    options.update(overrides)
+    return AsyncIOMotorClient(Config.DATABASE_URL, **options)
+
+async def get_db(request: Request) -> AsyncIOMotorDatabase:
+    return request.app.state.db
@@ -0,0 +1,99 @@
+"""
+Move the embedded general_attendee_ids / vip_attendee_ids arrays of every event
+into the registrations collection and replace them with per-type counters.
+
+    cd backend && python -m src.db.migrate_registrations [--batch-size 1000]
+
+Safe to re-run: registrations are upserted on (event_id, user_id) and an event's
+arrays are only removed after all of its attendees have been copied.
+"""
+import argparse
+import asyncio
+import uuid
+from datetime import datetime
+
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from src.db.indexes import ensure_indexes
+from src.db.main import DATABASE_NAME, create_client
+from src.events.utils import TicketService
+
+LEGACY_FIELDS = {
+    "General": "general_attendee_ids",
+    "VIP": "vip_attendee_ids",
+}
+
+
+def _ticket_id(token: str) -> str:
+    try:
+        return TicketService().verify_ticket_token(token)["ticket_id"]
+    except HTTPException:
+        return str(uuid.uuid4())
+
+
+async def migrate_event(db: AsyncIOMotorDatabase, event: dict, batch_size: int) -> int:
+    event_id = event["_id"]
+    migrated = 0
+
+    for ticket_type, field in LEGACY_FIELDS.items():
+        attendee_ids = event.get(field) or []
+        for start in range(0, len(attendee_ids), batch_size):
+            batch = attendee_ids[start:start + batch_size]
+            users = db["users"].find(
+                {"_id": {"$in": batch}},
+                {"first_name": 1, "last_name": 1, f"tickets.{event_id}": 1},
+            )
+            users = {user["_id"]: user async for user in users}
+
+            operations = []
+            for user_id in batch:
+                user = users.get(user_id, {})
+                ticket_token = user.get("tickets", {}).get(str(event_id))
+                registration = {
+                    "ticket_type": ticket_type,
+                    "ticket_id": _ticket_id(ticket_token) if ticket_token else str(uuid.uuid4()),
+                    "ticket_token": ticket_token,
+                    "first_name": user.get("first_name"),
+                    "last_name": user.get("last_name"),
+                    "created_at": event.get("created_at", datetime.now()),
+                }
+                operations.append(UpdateOne(
+                    {"event_id": event_id, "user_id": user_id},
+                    {"$setOnInsert": registration},
+                    upsert=True,
+                ))
+
+            await db["registrations"].bulk_write(operations, ordered=False)
+            migrated += len(operations)
+
+    counters = {
+        "general_attendee_count": await db["registrations"].count_documents({"event_id": event_id, "ticket_type": "General"}),
+        "vip_attendee_count": await db["registrations"].count_documents({"event_id": event_id, "ticket_type": "VIP"}),
+    }
+    await db["events"].update_one(
+        {"_id": event_id},
+        {"$set": counters, "$unset": {field: "" for field in LEGACY_FIELDS.values()}},
+    )
+    return migrated
+
+
+async def migrate(db: AsyncIOMotorDatabase, batch_size: int = 1000):
+    await ensure_indexes(db)
+
+    legacy = {"$or": [{field: {"$exists": True}} for field in LEGACY_FIELDS.values()]}
+    async for event in db["events"].find(legacy):
+        migrated = await migrate_event(db, event, batch_size)
+        print(f"Migrated {migrated} registrations for event {event['_id']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(migrate(create_client()[DATABASE_NAME], args.batch_size))
+
+
+if __name__ == "__main__":
+    main()
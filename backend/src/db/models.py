@@ -1,22 +1,43 @@
-from typing import Optional
-from pydantic import BaseModel, Field
+from typing import Any, Literal, Optional
+from pydantic import BaseModel, Field, GetCoreSchemaHandler, GetJsonSchemaHandler, field_validator
+from pydantic_core import core_schema
 from bson import ObjectId
 from datetime import datetime
 
 
 class PyObjectId(str):
     @classmethod
-    def __get_validators__(cls):
-        yield cls.validate
+    def __get_pydantic_core_schema__(cls, source_type: Any, handler: GetCoreSchemaHandler):
+        return core_schema.no_info_plain_validator_function(
+            cls.validate,
+            serialization=core_schema.to_string_ser_schema(),
+        )
 
     @classmethod
-    def validate(cls, v, handler):
+    def __get_pydantic_json_schema__(cls, schema, handler: GetJsonSchemaHandler):
+        return {"type": "string", "format": "objectid"}
+
+    @classmethod
+    def validate(cls, v):
         if isinstance(v, ObjectId):
             return str(v)
         if not ObjectId.is_valid(v):
             raise ValueError("Invalid ObjectId")
         return str(v)
 
+class GeoPoint(BaseModel):
+    """GeoJSON point; coordinates are [longitude, latitude]."""
+    type: Literal["Point"] = "Point"
+    coordinates: tuple[float, float]
+
+    @field_validator("coordinates")
+    @classmethod
+    def validate_coordinates(cls, v):
+        longitude, latitude = v
+        if not -180 <= longitude <= 180 or not -90 <= latitude <= 90:
+            raise ValueError("coordinates must be [longitude, latitude]")
+        return v
+
 class User(BaseModel):
     id: Optional[PyObjectId] = Field(alias="_id", default=None)
     email: str
@@ -40,8 +61,53 @@ class Event(BaseModel):
     created_at: datetime
     general_price: float
     vip_price: float
-    general_attendee_ids: list[PyObjectId] = Field(default_factory=list)
-    vip_attendee_ids: list[PyObjectId] = Field(default_factory=list)
+    geo: Optional[GeoPoint] = None
+    general_capacity: Optional[int] = None
+    vip_capacity: Optional[int] = None
+    general_attendee_count: int = 0
+    vip_attendee_count: int = 0
+
+    class Config:
+        json_encoders = {ObjectId: str}
+        populate_by_name = True
+
+class EventSummary(BaseModel):
+    """Public view of an event: no description and attendee counts only."""
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    name: str
+    type: str
+    location: str
+    date: datetime
+    general_price: float
+    vip_price: float
+    geo: Optional[GeoPoint] = None
+    general_capacity: Optional[int] = None
+    vip_capacity: Optional[int] = None
+    general_attendee_count: int = 0
+    vip_attendee_count: int = 0
+
+    class Config:
+        json_encoders = {ObjectId: str}
+        populate_by_name = True
+
+class EventSearchHit(EventSummary):
+    score: float
+    highlights: dict[str, str] = Field(default_factory=dict)
+
+class EventNearbyHit(EventSummary):
+    distance_m: float
+
+class Registration(BaseModel):
+    id: Optional[PyObjectId] = Field(alias="_id", default=None)
+    event_id: PyObjectId
+    user_id: PyObjectId
+    ticket_type: str
+    ticket_id: str
+    ticket_token: Optional[str] = None
+    first_name: Optional[str] = None
+    last_name: Optional[str] = None
+    created_at: datetime
+    issued_at: Optional[datetime] = None
 
     class Config:
         json_encoders = {ObjectId: str}
@@ -0,0 +1,58 @@
+import base64
+import binascii
+from typing import Optional
+
+from bson import json_util
+from fastapi import HTTPException
+from pymongo import ASCENDING
+
+
+def encode_cursor(values: dict) -> str:
+    raw = json_util.dumps(values).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> dict:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json_util.loads(base64.urlsafe_b64decode(padded))
+    except (binascii.Error, ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    if not isinstance(values, dict):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+    return values
+
+
+def keyset_filter(filters: dict, sort: list[tuple[str, int]], cursor: Optional[str]) -> dict:
+    """
+    Extend `filters` so that only documents strictly after the cursor position
+    (in `sort` order) match. The sort keys must end with a unique field, e.g. _id.
+    """
+    if not cursor:
+        return filters
+
+    values = decode_cursor(cursor)
+    if any(key not in values for key, _ in sort):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+    clauses = []
+    for i, (key, direction) in enumerate(sort):
+        clause = {k: values[k] for k, _ in sort[:i]}
+        clause[key] = {"$gt" if direction == ASCENDING else "$lt": values[key]}
+        clauses.append(clause)
+
+    after = clauses[0] if len(clauses) == 1 else {"$or": clauses}
+    return {"$and": [filters, after]} if filters else after
+
+
+def paginate(docs: list[dict], sort: list[tuple[str, int]], limit: int) -> tuple[list[dict], Optional[str]]:
+    """
+    Trim a result fetched with `limit + 1` and build the cursor for the next page.
+    """
+    if len(docs) <= limit:
+        return docs, None
+
+    docs = docs[:limit]
+    last = docs[-1]
+    return docs, encode_cursor({key: last[key] for key, _ in sort})
@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import defaultdict
+
+from pymongo.monitoring import ConnectionPoolListener
+
+
+def _server(address) -> str:
+    host, port = address
+    return f"{host}:{port}"
+
+
+class PoolMonitor(ConnectionPoolListener):
+    """
+    Tracks connection pool utilization for every server the client talks to.
+    pymongo calls these hooks from its own threads, so all counters are
+    updated under a lock. `in_use` against `max_pool_size` and the number of
+    operations `waiting` for a connection are what to watch when sizing the
+    pool per worker.
+    """
+
+    def __init__(self, max_pool_size: int = 0):
+        self.max_pool_size = max_pool_size
+        self._lock = threading.Lock()
+        self._servers = defaultdict(lambda: {
+            "open": 0,
+            "in_use": 0,
+            "waiting": 0,
+            "peak_in_use": 0,
+            "created_total": 0,
+            "closed_total": 0,
+            "checkouts_total": 0,
+            "checkout_failures_total": 0,
+            "checkout_wait_seconds_total": 0.0,
+            "cleared_total": 0,
+        })
+        self._wait_started: dict[int, list[float]] = defaultdict(list)
+
+    def _update(self, address, **deltas):
+        with self._lock:
+            server = self._servers[_server(address)]
+            for key, delta in deltas.items():
+                server[key] += delta
+            server["peak_in_use"] = max(server["peak_in_use"], server["in_use"])
+
+    def pool_created(self, event):
+        self._update(event.address)
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        self._update(event.address, cleared_total=1)
+
+    def pool_closed(self, event):
+        with self._lock:
+            self._servers.pop(_server(event.address), None)
+
+    def connection_created(self, event):
+        self._update(event.address, open=1, created_total=1)
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        self._update(event.address, open=-1, closed_total=1)
+
+    def connection_check_out_started(self, event):
+        # Check-out events carry no operation id; waits are matched per thread
+        with self._lock:
+            self._wait_started[threading.get_ident()].append(time.perf_counter())
+        self._update(event.address, waiting=1)
+
+    def _waited(self) -> float:
+        with self._lock:
+            started = self._wait_started.get(threading.get_ident())
+            if not started:
+                return 0.0
+            waited = time.perf_counter() - started.pop()
+            if not started:
+                del self._wait_started[threading.get_ident()]
+            return waited
+
+    def connection_check_out_failed(self, event):
+        self._update(
+            event.address,
+            waiting=-1,
+            checkout_failures_total=1,
+            checkout_wait_seconds_total=self._waited(),
+        )
+
+    def connection_checked_out(self, event):
+        self._update(
+            event.address,
+            waiting=-1,
+            in_use=1,
+            checkouts_total=1,
+            checkout_wait_seconds_total=self._waited(),
+        )
+
+    def connection_checked_in(self, event):
+        self._update(event.address, in_use=-1)
+
+    def stats(self) -> dict:
+        with self._lock:
+            servers = {address: dict(server) for address, server in self._servers.items()}
+
+        totals = {
+            key: sum(server[key] for server in servers.values())
+            for key in ("open", "in_use", "waiting", "created_total", "closed_total",
+                        "checkouts_total", "checkout_failures_total", "checkout_wait_seconds_total")
+        }
+        # Each server gets its own pool, so utilization is that of the busiest one
+        busiest = max((server["in_use"] for server in servers.values()), default=0)
+        return {
+            **totals,
+            "max_pool_size": self.max_pool_size,
+            "utilization": busiest / self.max_pool_size if self.max_pool_size else 0.0,
+            "servers": servers,
+        }
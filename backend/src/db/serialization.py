@@ -0,0 +1,49 @@
+from typing import Any
+
+import orjson
+from bson import ObjectId
+from fastapi.responses import Response
+from pydantic import BaseModel
+
+
+def _default(value: Any):
+    if isinstance(value, ObjectId):
+        return str(value)
+    if isinstance(value, BaseModel):
+        return value.model_dump(mode="json", by_alias=True)
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dumps(data: Any) -> bytes:
+    # orjson encodes datetimes natively; ObjectIds become their hex string
+    return orjson.dumps(data, default=_default)
+
+
+class MongoJSONResponse(Response):
+    """JSON response for documents read straight from Mongo, without a model round trip."""
+
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+def projection_for(model: type[BaseModel]) -> dict:
+    """Projection that returns exactly the fields `model` would keep."""
+    return {field.alias or name: 1 for name, field in model.model_fields.items() if (field.alias or name) != "_id"}
+
+
+def defaults_for(model: type[BaseModel]) -> dict:
+    return {
+        field.alias or name: field.get_default(call_default_factory=True)
+        for name, field in model.model_fields.items()
+        if not field.is_required() and (field.alias or name) != "_id"
+    }
+
+
+def lean(docs: list[dict], defaults: dict) -> list[dict]:
+    """
+    Fill in model defaults for fields missing from stored documents so a lean
+    response has the same shape as the model-validated one.
+    """
+    return [{**defaults, **doc} for doc in docs]
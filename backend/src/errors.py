@@ -75,6 +75,24 @@ class UserNotFound(BooklyException):
     pass
 
 
+class PasswordHashingBusy(BooklyException):
+    """Too many password hashes are already queued"""
+
+    pass
+
+
+class SoldOut(BooklyException):
+    """No seats left for the requested ticket type"""
+
+    pass
+
+
+class InvalidWebhookSignature(BooklyException):
+    """Webhook payload does not carry a valid, recent signature"""
+
+    pass
+
+
 class AccountNotVerified(Exception):
     """Account not yet verified"""
     pass
@@ -228,6 +246,40 @@ def register_all_errors(app: FastAPI):
         ),
     )
 
+    app.add_exception_handler(
+        PasswordHashingBusy,
+        create_exception_handler(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            initial_detail={
+                "message": "Too many sign-ins in progress",
+                "resolution": "Please try again shortly",
+                "error_code": "password_hashing_busy",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        SoldOut,
+        create_exception_handler(
+            status_code=status.HTTP_409_CONFLICT,
+            initial_detail={
+                "message": "Tickets of this type are sold out",
+                "error_code": "sold_out",
+            },
+        ),
+    )
+
+    app.add_exception_handler(
+        InvalidWebhookSignature,
+        create_exception_handler(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            initial_detail={
+                "message": "Invalid webhook signature",
+                "error_code": "invalid_webhook_signature",
+            },
+        ),
+    )
+
     @app.exception_handler(500)
     async def internal_server_error(request, exc):
 
@@ -0,0 +1,113 @@
+import hashlib
+import math
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from email.utils import formatdate, parsedate_to_datetime
+from typing import Optional
+
+from bson import json_util
+from fastapi import Request, Response
+
+from src.config import Config
+
+
+@dataclass
+class CachedResponse:
+    body: bytes
+    etag: str
+    version: int
+    # Catalog last-modified time in whole seconds; None for a body read before an invalidation
+    last_modified: Optional[int] = None
+    created_at: float = field(default_factory=time.time)
+
+    def response(self, request: Request) -> Response:
+        headers = {
+            "ETag": self.etag,
+            "Cache-Control": "private, no-cache",
+        }
+        if self.last_modified is not None:
+            headers["Last-Modified"] = formatdate(self.last_modified, usegmt=True)
+        if self._not_modified(request):
+            return Response(status_code=304, headers=headers)
+        return Response(content=self.body, media_type="application/json", headers=headers)
+
+    def _not_modified(self, request: Request) -> bool:
+        if_none_match = request.headers.get("if-none-match")
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(",")]
+            return "*" in tags or self.etag in tags or f"W/{self.etag}" in tags
+
+        if_modified_since = request.headers.get("if-modified-since")
+        if if_modified_since and self.last_modified is not None:
+            try:
+                return self.last_modified <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+
+class EventListCache:
+    """
+    Cache of rendered event listing responses, keyed by the normalized query.
+    Every catalog write (create, update, delete) bumps the version, advances
+    the catalog's Last-Modified time and drops all entries. The TTL bounds how stale attendee counters can get, and how long
+    another worker process can serve a listing from before a write it did not see.
+    """
+
+    def __init__(self, max_entries: int = 1024, ttl_seconds: float = 30):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.version = 0
+        self.last_modified = math.ceil(time.time())
+        self._entries: OrderedDict[str, CachedResponse] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(**query) -> str:
+        return json_util.dumps({k: v for k, v in query.items() if v is not None}, sort_keys=True)
+
+    def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None or entry.created_at + self.ttl_seconds <= time.time():
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, body: bytes, version: int) -> CachedResponse:
+        entry = CachedResponse(body=body, etag=f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"', version=version)
+        # Skip storing a body that was read before a concurrent invalidation
+        if version == self.version:
+            entry.last_modified = self.last_modified
+            self._entries[key] = entry
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return entry
+
+    def invalidate(self) -> None:
+        self.version += 1
+        # Rounded up, and always a later second than before, so second-granular
+        # If-Modified-Since never mistakes a change for the previous state
+        self.last_modified = max(math.ceil(time.time()), self.last_modified + 1)
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "version": self.version,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+
+event_list_cache = EventListCache(
+    max_entries=Config.EVENT_CACHE_MAX_ENTRIES,
+    ttl_seconds=Config.EVENT_CACHE_TTL_SECONDS,
+)
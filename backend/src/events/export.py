@@ -0,0 +1,138 @@
+import asyncio
+import time
+import uuid
+import zipfile
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Optional
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ASCENDING
+
+from src.db.pagination import encode_cursor, keyset_filter
+
+from .rendering import ticket_renderer
+
+# In-flight renders per export; bounds memory to roughly this many PDFs
+EXPORT_WINDOW = 32
+MAX_TRACKED_EXPORTS = 100
+
+EXPORT_SORT = [("_id", ASCENDING)]
+
+
+class _ChunkBuffer:
+    """Write-only sink for ZipFile; having no tell()/seek() makes zipfile stream with data descriptors."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+@dataclass
+class TicketExport:
+    id: str
+    event_id: str
+    cursor: Optional[str]
+    total: int
+    next_cursor: Optional[str] = None
+    rendered: int = 0
+    failed: list[str] = field(default_factory=list)
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def progress(self) -> dict:
+        return {
+            "export_id": self.id,
+            "event_id": self.event_id,
+            "total": self.total,
+            "cursor": self.cursor,
+            "rendered": self.rendered,
+            "failed": self.failed,
+            "percent": round(100 * self.rendered / self.total, 1) if self.total else 100.0,
+            # Pass this as ?cursor= to resume an interrupted download after the last ticket written
+            "next_cursor": self.next_cursor or self.cursor,
+            "finished": self.finished_at is not None,
+        }
+
+
+_exports: OrderedDict[str, TicketExport] = OrderedDict()
+
+
+def get_export(export_id: str) -> Optional[TicketExport]:
+    return _exports.get(export_id)
+
+
+def _export_query(event_id: str, cursor: Optional[str]) -> dict:
+    # Keyset on _id: tickets issued later for earlier registrations cannot shift a resume point
+    return keyset_filter({"event_id": ObjectId(event_id), "ticket_token": {"$ne": None}}, EXPORT_SORT, cursor)
+
+
+async def start_ticket_export(db: AsyncIOMotorDatabase, event_id: str, cursor: Optional[str] = None) -> TicketExport:
+    export = TicketExport(
+        id=str(uuid.uuid4()),
+        event_id=event_id,
+        cursor=cursor,
+        total=await db["registrations"].count_documents(_export_query(event_id, cursor)),
+    )
+    _exports[export.id] = export
+    while len(_exports) > MAX_TRACKED_EXPORTS:
+        _exports.popitem(last=False)
+    return export
+
+
+async def stream_ticket_zip(db: AsyncIOMotorDatabase, export: TicketExport) -> AsyncIterator[bytes]:
+    """
+    Yield a ZIP archive of every ticket of the event, in registration order,
+    starting after export.cursor. Up to EXPORT_WINDOW tickets render
+    concurrently while finished ones are already on the wire.
+    """
+    registrations = db["registrations"].find(_export_query(export.event_id, export.cursor), {"ticket_id": 1, "ticket_token": 1}) \
+        .sort(EXPORT_SORT).batch_size(EXPORT_WINDOW * 4)
+
+    buffer = _ChunkBuffer()
+    archive = zipfile.ZipFile(buffer, mode="w", compression=zipfile.ZIP_STORED)
+    pending: deque = deque()
+    index = 0
+
+    async def write_next():
+        position, registration_id, ticket_id, task = pending.popleft()
+        try:
+            pdf = await task
+        except Exception:
+            export.failed.append(ticket_id)
+        else:
+            archive.writestr(f"{position:06d}_{ticket_id}.pdf", pdf)
+        export.rendered += 1
+        export.next_cursor = encode_cursor({"_id": registration_id})
+        return buffer.drain()
+
+    try:
+        async for registration in registrations:
+            task = asyncio.ensure_future(ticket_renderer.render(registration["ticket_token"], remember=False))
+            pending.append((index, registration["_id"], registration["ticket_id"], task))
+            index += 1
+            if len(pending) >= EXPORT_WINDOW:
+                yield await write_next()
+
+        while pending:
+            yield await write_next()
+
+        archive.close()
+        yield buffer.drain()
+        export.finished_at = time.time()
+    finally:
+        # Client went away: stop rendering what nobody will receive
+        for *_, task in pending:
+            task.cancel()
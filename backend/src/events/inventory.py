@@ -0,0 +1,229 @@
+import logging
+import random
+from datetime import datetime, timedelta
+from typing import Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from pymongo import InsertOne
+from pymongo.errors import DuplicateKeyError
+
+from src.config import Config
+from src.errors import SoldOut
+
+logger = logging.getLogger(__name__)
+
+# Keep released and converted holds around for support lookups before the TTL index drops them
+HOLD_RETENTION = timedelta(days=1)
+
+
+def _shard_id(event_id: ObjectId, ticket_type: str, shard: int) -> str:
+    return f"{event_id}:{ticket_type}:{shard}"
+
+
+def split_capacity(capacity: int, shards: int) -> list[int]:
+    """Spread capacity as evenly as possible, e.g. 10 over 4 shards -> [3, 3, 2, 2]."""
+    base, extra = divmod(capacity, shards)
+    return [base + (1 if shard < extra else 0) for shard in range(shards)]
+
+
+class InventoryService:
+    """
+    Seats per event and ticket type, for types that have a capacity.
+
+    The remaining count of a type is split over INVENTORY_SHARDS documents in
+    `inventory`. A reservation decrements one random shard with a conditional
+    $inc, so concurrent buyers of a hot event mostly update different
+    documents instead of queueing on one; only once a shard runs dry does a
+    buyer fall back to any shard with seats left.
+
+    Paid checkouts reserve a seat as a hold in `holds` until payment is
+    confirmed. Holds that expire unpaid are released back to the shards by a
+    periodic job. Holds get a purge_at only once released or converted, so the
+    TTL index on it never drops a hold whose seat is still taken.
+    """
+
+    def __init__(self, db):
+        self.inventory = db["inventory"]
+        self.holds = db["holds"]
+        self.registrations = db["registrations"]
+        self.shards = Config.INVENTORY_SHARDS
+
+    async def set_capacity(self, event_id: ObjectId, ticket_type: str, capacity: Optional[int]):
+        """
+        (Re)build the shards of one ticket type from its capacity minus the
+        seats already registered or held. Not atomic with concurrent sales,
+        so change capacities while a type is not selling hard.
+        """
+        await self.inventory.delete_many({"event_id": event_id, "ticket_type": ticket_type})
+        if capacity is None:
+            return
+
+        taken = await self.registrations.count_documents({"event_id": event_id, "ticket_type": ticket_type})
+        taken += await self.holds.count_documents({"event_id": event_id, "ticket_type": ticket_type, "status": "held"})
+        available = split_capacity(max(capacity - taken, 0), self.shards)
+        await self.inventory.bulk_write([
+            InsertOne({
+                "_id": _shard_id(event_id, ticket_type, shard),
+                "event_id": event_id,
+                "ticket_type": ticket_type,
+                "shard": shard,
+                "available": seats,
+            })
+            for shard, seats in enumerate(available)
+        ])
+
+    async def delete_event(self, event_id: ObjectId):
+        await self.inventory.delete_many({"event_id": event_id})
+        await self.holds.delete_many({"event_id": event_id})
+
+    async def reserve(self, event_id: ObjectId, ticket_type: str) -> int:
+        """Take one seat and return the shard it came from; raises SoldOut."""
+        shard = await self.inventory.find_one_and_update(
+            {"_id": _shard_id(event_id, ticket_type, random.randrange(self.shards)), "available": {"$gt": 0}},
+            {"$inc": {"available": -1}},
+            projection={"shard": 1},
+        )
+        if shard is None:
+            # That shard is drained; take a seat from any shard that has one left
+            shard = await self.inventory.find_one_and_update(
+                {"event_id": event_id, "ticket_type": ticket_type, "available": {"$gt": 0}},
+                {"$inc": {"available": -1}},
+                projection={"shard": 1},
+            )
+        if shard is None:
+            raise SoldOut()
+        return shard["shard"]
+
+    async def release(self, event_id: ObjectId, ticket_type: str, shard: Optional[int]):
+        if shard is None:
+            return
+        # A missing shard means the capacity was rebuilt or removed since; nothing to give back
+        await self.inventory.update_one({"_id": _shard_id(event_id, ticket_type, shard)}, {"$inc": {"available": 1}})
+
+    async def availability(self, event_id: ObjectId) -> dict[str, int]:
+        rows = await self.inventory.aggregate([
+            {"$match": {"event_id": event_id}},
+            {"$group": {"_id": "$ticket_type", "available": {"$sum": "$available"}}},
+        ]).to_list(length=None)
+        return {row["_id"]: row["available"] for row in rows}
+
+    async def hold(self, event_id: ObjectId, user_id: str, ticket_type: str, limited: bool) -> dict:
+        """
+        Reserve a seat for a user's checkout. A user has at most one live hold
+        per event; starting checkout again extends it rather than taking a
+        second seat, and switching ticket type moves it to a seat of the new
+        type.
+
+        An earlier checkout session may still rely on a hold this call
+        extended or moved, so the returned hold carries its prior state under
+        "previous". Once the new checkout exists call commit_hold, or
+        undo_hold if it could not be started.
+        """
+        now = datetime.now()
+        expires_at = now + timedelta(seconds=Config.CHECKOUT_HOLD_SECONDS + Config.HOLD_GRACE_SECONDS)
+        lifetime = {"expires_at": expires_at}
+
+        live = {"event_id": event_id, "user_id": ObjectId(user_id), "status": "held"}
+        held = await self.holds.find_one(live)
+        if held is not None and held["ticket_type"] == ticket_type:
+            result = await self.holds.update_one({"_id": held["_id"], "status": "held"}, {"$set": lifetime})
+            if result.modified_count:
+                return {**held, **lifetime, "previous": held}
+            held = None
+
+        shard = await self.reserve(event_id, ticket_type) if limited else None
+        if held is not None:
+            # Switching ticket type: the old seat stays taken until commit_hold
+            result = await self.holds.update_one(
+                {"_id": held["_id"], "status": "held", "ticket_type": held["ticket_type"], "shard": held["shard"]},
+                {"$set": {"ticket_type": ticket_type, "shard": shard, **lifetime}},
+            )
+            if result.modified_count:
+                return {**held, "ticket_type": ticket_type, "shard": shard, **lifetime, "previous": held}
+
+        hold = {
+            **live,
+            "ticket_type": ticket_type,
+            "shard": shard,
+            "created_at": now,
+            **lifetime,
+        }
+        try:
+            await self.holds.insert_one(hold)
+        except DuplicateKeyError:
+            # A concurrent checkout by the same user got its hold in first
+            await self.release(event_id, ticket_type, shard)
+            raise HTTPException(status_code=409, detail="Checkout already in progress")
+        return hold
+
+    async def commit_hold(self, hold: dict):
+        """The checkout for a hold from hold() exists; give back the seat of a ticket type switched away from."""
+        previous = hold.get("previous")
+        if previous is not None and previous["ticket_type"] != hold["ticket_type"]:
+            await self.release(hold["event_id"], previous["ticket_type"], previous["shard"])
+
+    async def undo_hold(self, hold: dict):
+        """
+        The checkout for a hold from hold() could not be started: release a
+        hold it created, or put back the type, seat and expiry of one it changed.
+        """
+        previous = hold.get("previous")
+        if previous is None:
+            await self.release_hold(hold["_id"])
+            return
+
+        result = await self.holds.update_one(
+            {"_id": hold["_id"], "status": "held", "ticket_type": hold["ticket_type"], "shard": hold["shard"], "expires_at": hold["expires_at"]},
+            {"$set": {"ticket_type": previous["ticket_type"], "shard": previous["shard"], "expires_at": previous["expires_at"]}},
+        )
+        if result.modified_count and previous["ticket_type"] != hold["ticket_type"]:
+            await self.release(hold["event_id"], hold["ticket_type"], hold["shard"])
+
+    async def release_hold(self, hold_id: str, expiring_before: Optional[datetime] = None) -> bool:
+        query = {"_id": ObjectId(hold_id), "status": "held"}
+        if expiring_before is not None:
+            query["expires_at"] = {"$lte": expiring_before}
+        now = datetime.now()
+        hold = await self.holds.find_one_and_update(
+            query,
+            {"$set": {"status": "released", "released_at": now, "purge_at": now + HOLD_RETENTION}},
+        )
+        if hold is None:
+            return False
+        await self.release(hold["event_id"], hold["ticket_type"], hold["shard"])
+        return True
+
+    async def get_live_hold(self, hold_id: str) -> Optional[dict]:
+        return await self.holds.find_one({"_id": ObjectId(hold_id), "status": "held"})
+
+    async def convert_hold(self, hold_id: ObjectId, registration_id: ObjectId) -> bool:
+        """
+        Hand a live hold's seat to a registration. Also True when the hold was
+        already converted for that registration, so a retry may call it again;
+        False if the hold was released in the meantime.
+        """
+        now = datetime.now()
+        result = await self.holds.update_one(
+            {"_id": ObjectId(hold_id), "$or": [{"status": "held"}, {"status": "converted", "registration_id": registration_id}]},
+            {"$set": {"status": "converted", "registration_id": registration_id, "converted_at": now, "purge_at": now + HOLD_RETENTION}},
+        )
+        return result.matched_count > 0
+
+    async def release_expired_holds(self, limit: int = 1000) -> int:
+        released = 0
+        while released < limit:
+            # Flip the status first: a crash before the $inc loses a seat rather than selling it twice
+            now = datetime.now()
+            hold = await self.holds.find_one_and_update(
+                {"status": "held", "expires_at": {"$lt": now}},
+                {"$set": {"status": "released", "released_at": now, "purge_at": now + HOLD_RETENTION}},
+            )
+            if hold is None:
+                break
+            await self.release(hold["event_id"], hold["ticket_type"], hold["shard"])
+            released += 1
+
+        if released:
+            logger.info("Released expired checkout holds", extra={"released": released})
+        return released
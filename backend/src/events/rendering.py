@@ -0,0 +1,181 @@
+import asyncio
+import hashlib
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+from src.config import Config
+
+from .utils import TicketService, render_ticket_pdf
+
+logger = logging.getLogger(__name__)
+
+# Pruning deletes down to this share of the disk limit, so it does not run on every write
+PRUNE_TO = 0.8
+
+
+class TicketRenderer:
+    """
+    Renders ticket PDFs in a process pool, behind an in-memory LRU and an
+    on-disk cache keyed by ticket_id. A ticket's content is fixed by its signed
+    token, so cached PDFs never need invalidating. Concurrent requests for the
+    same ticket share one render.
+
+    The disk cache is capped at max_disk_bytes: past it, the least recently
+    used files (by mtime, which reads refresh) are deleted. The cache is an
+    optimization only, so disk errors are logged and the rendered PDF is
+    still returned.
+    """
+
+    def __init__(self, cache_dir: str, memory_items: int = 1024, workers: int = 2, max_disk_bytes: int = 512 * 2**20):
+        self.cache_dir = Path(cache_dir)
+        self.memory_items = memory_items
+        self.workers = workers
+        self.max_disk_bytes = max_disk_bytes
+        # Estimated size of the disk cache; None until the first write scans it
+        self._disk_bytes: Optional[int] = None
+        self._disk_lock = threading.Lock()
+        self._memory: OrderedDict[str, bytes] = OrderedDict()
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.renders = 0
+
+    def _path(self, ticket_id: str) -> Path:
+        return self.cache_dir / f"{hashlib.sha256(ticket_id.encode()).hexdigest()}.pdf"
+
+    def _remember(self, ticket_id: str, pdf: bytes) -> None:
+        self._memory[ticket_id] = pdf
+        self._memory.move_to_end(ticket_id)
+        while len(self._memory) > self.memory_items:
+            self._memory.popitem(last=False)
+
+    def _read_disk(self, path: Path) -> Optional[bytes]:
+        try:
+            pdf = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            logger.warning("Could not read cached ticket PDF: %s", e)
+            return None
+        try:
+            # Mark as recently used for pruning
+            os.utime(path)
+        except OSError:
+            pass
+        return pdf
+
+    def _write_disk(self, path: Path, pdf: bytes) -> None:
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_suffix(f".{os.getpid()}.{threading.get_ident()}.tmp")
+        try:
+            tmp_path.write_bytes(pdf)
+            os.replace(tmp_path, path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+
+        with self._disk_lock:
+            if self._disk_bytes is None:
+                self._disk_bytes = self._scan_disk()[1]
+            else:
+                self._disk_bytes += len(pdf)
+            if self._disk_bytes > self.max_disk_bytes:
+                self._prune()
+
+    def _scan_disk(self) -> tuple[list[tuple[float, int, Path]], int]:
+        files = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.name.endswith(".pdf"):
+                try:
+                    stat = entry.stat()
+                except FileNotFoundError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, Path(entry.path)))
+        return files, sum(size for _, size, _ in files)
+
+    def _prune(self) -> None:
+        # Rescans rather than trusting the estimate, since other processes share the directory
+        files, total = self._scan_disk()
+        files.sort()
+        target = self.max_disk_bytes * PRUNE_TO
+        pruned = 0
+        for _, size, path in files:
+            if total <= target:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            pruned += 1
+        self._disk_bytes = total
+        logger.info("Pruned ticket PDF cache", extra={"files": pruned, "bytes": total})
+
+    async def _load_or_render(self, ticket_id: str, ticket_data: dict) -> bytes:
+        path = self._path(ticket_id)
+        pdf = await asyncio.to_thread(self._read_disk, path)
+        if pdf is not None:
+            self.disk_hits += 1
+            return pdf
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+        loop = asyncio.get_running_loop()
+        pdf = await loop.run_in_executor(self._executor, render_ticket_pdf, ticket_data)
+        self.renders += 1
+        try:
+            await asyncio.to_thread(self._write_disk, path, pdf)
+        except OSError as e:
+            # e.g. disk full or not writable; the download does not depend on the cache
+            logger.warning("Could not cache ticket PDF: %s", e)
+        return pdf
+
+    async def render(self, token: str, remember: bool = True) -> bytes:
+        ticket_data = TicketService().verify_ticket_token(token)
+        ticket_id = ticket_data["ticket_id"]
+
+        pdf = self._memory.get(ticket_id)
+        if pdf is not None:
+            self._memory.move_to_end(ticket_id)
+            self.memory_hits += 1
+            return pdf
+
+        pending = self._inflight.get(ticket_id)
+        if pending is None:
+            pending = asyncio.ensure_future(self._load_or_render(ticket_id, ticket_data))
+            self._inflight[ticket_id] = pending
+            pending.add_done_callback(lambda _: self._inflight.pop(ticket_id, None))
+
+        pdf = await asyncio.shield(pending)
+        if remember:
+            self._remember(ticket_id, pdf)
+        return pdf
+
+    async def render_stream(self, token: str) -> io.BytesIO:
+        return io.BytesIO(await self.render(token))
+
+    def stats(self) -> dict:
+        return {
+            "memory_items": len(self._memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "renders": self.renders,
+            "in_flight": len(self._inflight),
+            "disk_bytes": self._disk_bytes,
+        }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+ticket_renderer = TicketRenderer(
+    cache_dir=Config.TICKET_CACHE_DIR,
+    memory_items=Config.TICKET_CACHE_ITEMS,
+    workers=Config.TICKET_RENDER_WORKERS,
+    max_disk_bytes=Config.TICKET_CACHE_MAX_MB * 2**20,
+)
@@ -1,37 +1,73 @@
-from typing import List, Optional
-from datetime import datetime
+from typing import List, Literal, Optional
+from datetime import datetime, time, timedelta, timezone
 
-from fastapi import APIRouter, Depends, status, Query
+from fastapi import APIRouter, Depends, Request, status, Query
 from fastapi.exceptions import HTTPException
+from fastapi.responses import JSONResponse, StreamingResponse
 
+from src.config import Config
 from src.auth.dependencies import AccessTokenFromCookie, RoleChecker, get_current_user_with_cookie
+from src.auth.service import UserService
 from src.events.service import EventService
 from src.db.main import get_db
-from src.db.models import Event, User
+from src.db.models import User
+from src.db.serialization import MongoJSONResponse, dumps
 from src.payments.stripe_service import StripeService
-from .schemas import EventCreateModel, RegistrationRequest
+from src.services import get_event_service, get_stripe_service, get_user_service
+from .cache import event_list_cache
+from .export import get_export, start_ticket_export, stream_ticket_zip
+from .schemas import (
+    AttendeePage,
+    EventCreateModel,
+    EventFullPage,
+    EventNearbyPage,
+    EventPage,
+    EventSearchPage,
+    EventSuggestion,
+    RegistrationRequest,
+)
 
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 events_router = APIRouter()
 
 role_checker = RoleChecker(["admin", "user"])
+# Read-only endpoints authorize from the token's role claim alone
+claims_role_checker = RoleChecker(["admin", "user"], from_claims=True)
+full_view_checker = RoleChecker(["admin"], from_claims=True)
 
-@events_router.get("/events", dependencies=[Depends(role_checker)])
-async def get_all_events(
-    db: AsyncIOMotorDatabase = Depends(get_db),
+# Widest date range /events/count?group_by=day will aggregate over
+MAX_DAY_COUNT_WINDOW = timedelta(days=366)
+
+def _utc_naive(value: datetime) -> datetime:
+    # Stored dates come back from Mongo as naive UTC
+    return value.astimezone(timezone.utc).replace(tzinfo=None) if value.tzinfo else value
+
+def event_filters(
     type: Optional[str] = Query(None),
-    date: Optional[datetime] = Query(None),
+    date: Optional[datetime] = Query(None, description="Events on this calendar day"),
+    date_from: Optional[datetime] = Query(None),
+    date_to: Optional[datetime] = Query(None),
     location: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
-):
+) -> dict:
     filters = {}
 
     if type:
         filters["type"] = type
+
+    date_range = {}
     if date:
-        filters["date"] = date
+        day = datetime.combine(_utc_naive(date).date(), time.min)
+        date_range = {"$gte": day, "$lt": day + timedelta(days=1)}
+    if date_from:
+        date_range["$gte"] = max(date_range.get("$gte", datetime.min), _utc_naive(date_from))
+    if date_to:
+        date_range["$lte"] = _utc_naive(date_to)
+    if date_range:
+        filters["date"] = date_range
+
     if location:
         filters["location"] = location
 
@@ -48,33 +84,183 @@ async def get_all_events(
             {"vip_price": price_filter}
         ]
 
-    event_service = EventService(db)
-    return await event_service.get_all_events(filters)
+    return filters
+
+async def full_view_allowed(
+    request: Request,
+    full: bool = Query(False),
+    token_details: dict = Depends(AccessTokenFromCookie()),
+    user_service: UserService = Depends(get_user_service),
+) -> bool:
+    # Full event documents are an explicit, admin-only opt-in; the role is
+    # resolved like claims_role_checker does, so refreshed tokens work too
+    if full:
+        await full_view_checker(request, token_details, user_service)
+    return full
+
+@events_router.get("/events", dependencies=[Depends(claims_role_checker)], response_model=EventPage)
+async def get_all_events(
+    request: Request,
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+    order_by: Literal["date", "id"] = Query("date"),
+    full: bool = Depends(full_view_allowed),
+):
+    if full:
+        # Serialized as EventFullPage here; response_model=EventPage would strip it to summaries
+        page = await event_service.get_all_events(filters, limit=limit, cursor=cursor, order_by=order_by, full=True)
+        return MongoJSONResponse(EventFullPage(**page))
+
+    # Summary listings are identical for every user, so they are served from the response cache
+    key = event_list_cache.key(filters=filters, limit=limit, cursor=cursor, order_by=order_by)
+    cached = event_list_cache.get(key)
+    if cached is None:
+        version = event_list_cache.version
+        page = await event_service.get_all_events(filters, limit=limit, cursor=cursor, order_by=order_by, lean_docs=True)
+        cached = event_list_cache.put(key, dumps(page), version)
+    return cached.response(request)
+
+@events_router.get("/events/upcoming", dependencies=[Depends(claims_role_checker)], response_model=EventPage)
+async def get_upcoming_events(
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: Optional[str] = Query(None),
+):
+    # Walks the (date, _id) index forward from now; past events are never read
+    now = datetime.utcnow()
+    date_range = filters.setdefault("date", {})
+    date_range["$gte"] = max(date_range.get("$gte", now), now)
+
+    page = await event_service.get_all_events(filters, limit=limit, cursor=cursor, order_by="date", lean_docs=True)
+    return MongoJSONResponse(page)
+
+@events_router.get("/events/nearby", dependencies=[Depends(claims_role_checker)], response_model=EventNearbyPage)
+async def get_nearby_events(
+    lng: float = Query(..., ge=-180, le=180),
+    lat: float = Query(..., ge=-90, le=90),
+    radius_km: float = Query(10, gt=0, le=500),
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    limit: int = Query(20, ge=1, le=100),
+    offset: int = Query(0, ge=0, le=1000),
+):
+    return await event_service.find_events_near(lng, lat, radius_km * 1000, filters, limit=limit, offset=offset)
+
+@events_router.get("/events/count", dependencies=[Depends(claims_role_checker)])
+async def count_events(
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    group_by: Optional[Literal["day"]] = Query(None),
+):
+    if group_by == "day":
+        # Bounded so the aggregation only reads the index range of the window
+        date_range = filters.get("date", {})
+        start, end = date_range.get("$gte"), date_range.get("$lte", date_range.get("$lt"))
+        if start is None or end is None or end - start > MAX_DAY_COUNT_WINDOW:
+            raise HTTPException(
+                status_code=400,
+                detail=f"group_by=day needs date_from and date_to at most {MAX_DAY_COUNT_WINDOW.days} days apart",
+            )
+        return await event_service.count_events_by_day(filters)
+    return {"count": await event_service.count_events(filters)}
+
+@events_router.get("/events/export", dependencies=[Depends(RoleChecker(["admin"]))])
+async def export_events(
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    order_by: Literal["date", "id"] = Query("date"),
+):
+    return StreamingResponse(
+        event_service.stream_events(filters, order_by=order_by),
+        media_type="application/x-ndjson",
+    )
+
+@events_router.get("/events/search", dependencies=[Depends(claims_role_checker)], response_model=EventSearchPage)
+async def search_events(
+    q: str = Query(..., min_length=1, max_length=200),
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0, le=1000),
+):
+    return await event_service.search_events(q, filters, limit=limit, offset=offset)
+
+@events_router.get("/events/autocomplete", dependencies=[Depends(claims_role_checker)], response_model=List[EventSuggestion])
+async def autocomplete_events(
+    prefix: str = Query(..., min_length=2, max_length=50),
+    event_service: EventService = Depends(get_event_service),
+    filters: dict = Depends(event_filters),
+    limit: int = Query(10, ge=1, le=25),
+):
+    return await event_service.suggest_events(prefix, filters, limit=limit)
 
 @events_router.post("/create-event", dependencies=[Depends(RoleChecker(["admin"]))])
 async def create_event(
     event_data: EventCreateModel,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
 ):
-    event_service = EventService(db)
     return await event_service.create_event(event_data)
 
-@events_router.get("/{event_id}", dependencies=[Depends(role_checker)])
+@events_router.get("/{event_id}", dependencies=[Depends(claims_role_checker)])
 async def get_event_by_id(
+    event_id: str,
+    event_service: EventService = Depends(get_event_service),
+    full: bool = Depends(full_view_allowed),
+):
+    return await event_service.get_event_by_id(event_id, full=full)
+
+@events_router.get("/{event_id}/availability", dependencies=[Depends(claims_role_checker)])
+async def get_event_availability(
+    event_id: str,
+    event_service: EventService = Depends(get_event_service),
+):
+    return await event_service.get_availability(event_id)
+
+@events_router.get("/{event_id}/attendees", dependencies=[Depends(RoleChecker(["admin"]))], response_model=AttendeePage)
+async def get_event_attendees(
+    event_id: str,
+    event_service: EventService = Depends(get_event_service),
+    ticket_type: Optional[Literal["General", "VIP"]] = Query(None),
+    limit: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = Query(None),
+):
+    return await event_service.get_attendees(event_id, ticket_type=ticket_type, limit=limit, cursor=cursor)
+
+@events_router.get("/{event_id}/tickets/export", dependencies=[Depends(RoleChecker(["admin"]))])
+async def export_event_tickets(
     event_id: str,
     db: AsyncIOMotorDatabase = Depends(get_db),
+    cursor: Optional[str] = Query(None, description="next_cursor from the progress of an interrupted export"),
 ):
-    event_service = EventService(db)
-    return await event_service.get_event_by_id(event_id)
+    export = await start_ticket_export(db, event_id, cursor)
+    return StreamingResponse(
+        stream_ticket_zip(db, export),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": f"attachment; filename={event_id}_tickets_{export.id}.zip",
+            "X-Export-Id": export.id,
+            "X-Total-Tickets": str(export.total),
+        },
+    )
+
+@events_router.get("/{event_id}/tickets/export/{export_id}", dependencies=[Depends(RoleChecker(["admin"]))])
+async def get_ticket_export_progress(event_id: str, export_id: str):
+    export = get_export(export_id)
+    if export is None or export.event_id != event_id:
+        raise HTTPException(status_code=404, detail="Export not found")
+    return export.progress()
 
 @events_router.post("/{event_id}/attend", dependencies=[Depends(role_checker)])
 async def attend_event(
     request: RegistrationRequest,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
     user: User = Depends(get_current_user_with_cookie),
+    stripe_service: StripeService = Depends(get_stripe_service),
 ):
-    event_service = EventService(db)
-    event = await event_service.get_event_by_id(request.event_id)
+    event = await event_service.get_event_by_id(request.event_id, full=False)
     if request.type == "General":
         fee = event.general_price
     elif request.type == "VIP":
@@ -83,47 +269,54 @@ async def attend_event(
         raise HTTPException(status_code=400, detail="Invalid ticket type")
     
     if fee == 0:
-        return await event_service.attend_event(request.event_id, user.id, user.first_name, user.last_name, request.type)
+        # The ticket is issued in the background; it shows up under /auth/me/events once ready
+        registration = await event_service.attend_event(request.event_id, user.id, user.first_name, user.last_name, request.type)
+        return JSONResponse(registration, status_code=status.HTTP_202_ACCEPTED)
     else:
-        # Strip payment integration
-        stripe_service = StripeService()
-        checkout_url = stripe_service.create_checkout_session(
-            user_email=user.email,
-            amount=fee,
-            event_name=event.name,
-            ticket_type=request.type,
-            metadata={
-                "user_email": user.email,
-                "user_id": user.id,
-                "event_id": request.event_id,
-                "ticket_type": request.type
-            }
-        )
-        return {"checkout_url": checkout_url}
+        # The seat is held for the lifetime of the Stripe session, plus a grace period for late webhooks
+        hold = await event_service.hold_ticket(event, user.id, request.type)
+        try:
+            checkout_url = await stripe_service.create_checkout_session(
+                user_email=user.email,
+                amount=fee,
+                event_name=event.name,
+                ticket_type=request.type,
+                metadata={
+                    "user_email": user.email,
+                    "user_id": user.id,
+                    "event_id": request.event_id,
+                    "ticket_type": request.type,
+                    "hold_id": str(hold["_id"]),
+                },
+                expires_in=Config.CHECKOUT_HOLD_SECONDS,
+            )
+        except Exception:
+            # Leaves a hold an earlier, still open checkout relies on as it was
+            await event_service.inventory.undo_hold(hold)
+            raise
+        await event_service.inventory.commit_hold(hold)
+        return {"checkout_url": checkout_url, "hold_expires_at": hold["expires_at"]}
 
 @events_router.get("/{user_id}/events/{event_id}/get-ticket")
 async def get_ticket_by_user_id(
     user_id: str,
     event_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
 ):
-    event_service = EventService(db)
     return await event_service.get_ticket_by_user_id(user_id, event_id)
 
 @events_router.put("/{event_id}", dependencies=[Depends(RoleChecker(["admin"]))])
 async def update_event(
     event_id: str,
     event_data: EventCreateModel,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
 ):
-    event_service = EventService(db)
     return await event_service.update_event(event_id, event_data)
 
 @events_router.delete("/{event_id}", dependencies=[Depends(RoleChecker(["admin"]))])
 async def delete_event(
     event_id: str,
-    db: AsyncIOMotorDatabase = Depends(get_db),
+    event_service: EventService = Depends(get_event_service),
 ):
-    event_service = EventService(db)
     return await event_service.delete_event(event_id)
 
@@ -1,7 +1,7 @@
 from datetime import datetime
-from pydantic import BaseModel
-from typing import List, Literal
-from src.db.models import Event
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional
+from src.db.models import Event, EventNearbyHit, EventSearchHit, EventSummary, GeoPoint, Registration
 
 class EventCreateModel(BaseModel):
     name: str
@@ -11,7 +11,36 @@ class EventCreateModel(BaseModel):
     date: datetime
     general_price: float
     vip_price: float
+    geo: Optional[GeoPoint] = None
+    # None means no limit for that ticket type
+    general_capacity: Optional[int] = Field(None, ge=0)
+    vip_capacity: Optional[int] = Field(None, ge=0)
     
 class RegistrationRequest(BaseModel):
     event_id: str
     type: Literal["General", "VIP"]
+
+class EventPage(BaseModel):
+    events: List[EventSummary]
+    next_cursor: Optional[str] = None
+
+class EventFullPage(BaseModel):
+    """Listing page with full event documents, for admins asking for full=true."""
+    events: List[Event]
+    next_cursor: Optional[str] = None
+
+class EventSearchPage(BaseModel):
+    hits: List[EventSearchHit]
+    next_offset: Optional[int] = None
+
+class EventNearbyPage(BaseModel):
+    hits: List[EventNearbyHit]
+    next_offset: Optional[int] = None
+
+class EventSuggestion(BaseModel):
+    id: str
+    name: str
+
+class AttendeePage(BaseModel):
+    attendees: List[Registration]
+    next_cursor: Optional[str] = None
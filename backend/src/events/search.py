@@ -0,0 +1,53 @@
+import html
+import re
+
+MAX_TERM_LENGTH = 32
+SNIPPET_RADIUS = 80
+
+_WORD = re.compile(r"\w+")
+
+
+def search_terms(*texts: str) -> list[str]:
+    """Lower-cased distinct words used for indexed prefix (autocomplete) lookups."""
+    terms = {word[:MAX_TERM_LENGTH] for text in texts for word in _WORD.findall(text.lower()) if len(word) > 1}
+    return sorted(terms)
+
+
+def query_terms(query: str) -> list[str]:
+    # Negated words ("-jazz") are excluded from $text matches, so never highlight them
+    return [word.lower() for word in re.findall(r"(?<![-\w])\w+", query)]
+
+
+def _highlighter(terms: list[str]):
+    if not terms:
+        return None
+    return re.compile(r"\b(" + "|".join(re.escape(term) for term in terms) + r")\w*", re.IGNORECASE)
+
+
+def _mark(text: str, pattern: re.Pattern) -> str:
+    return pattern.sub(lambda m: f"<mark>{m.group(0)}</mark>", html.escape(text))
+
+
+def highlight(event: dict, query: str) -> dict[str, str]:
+    """
+    HTML-escaped fragments of name, location and description with the matched
+    words (and their stemmed extensions) wrapped in <mark>. The description is
+    cut down to a snippet around its first match.
+    """
+    pattern = _highlighter(query_terms(query))
+    if pattern is None:
+        return {}
+
+    highlights = {}
+    for field in ("name", "location"):
+        if event.get(field) and pattern.search(event[field]):
+            highlights[field] = _mark(event[field], pattern)
+
+    description = event.get("description") or ""
+    match = pattern.search(description)
+    if match:
+        start = max(match.start() - SNIPPET_RADIUS, 0)
+        end = min(match.end() + SNIPPET_RADIUS, len(description))
+        snippet = _mark(description[start:end], pattern)
+        highlights["description"] = ("…" if start else "") + snippet + ("…" if end < len(description) else "")
+    return highlights
@@ -1,85 +1,465 @@
+import logging
+import re
 from datetime import datetime
+from typing import Optional
 import uuid
 
 from fastapi import HTTPException
+from pymongo import ASCENDING, DESCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 from .schemas import EventCreateModel
-from src.db.models import Event, User
+from src.db.models import Event, EventNearbyHit, EventSearchHit, EventSummary, Registration
+from .cache import event_list_cache
+from .inventory import InventoryService
+from .search import MAX_TERM_LENGTH, highlight, search_terms
 from .utils import TicketService
 from bson import ObjectId
 from src.auth.service import UserService
+from src.db.pagination import keyset_filter, paginate
+from src.db.serialization import defaults_for, dumps, lean, projection_for
+from src.errors import SoldOut
+from src.jobs.queue import JobQueue
+
+logger = logging.getLogger(__name__)
+
+EVENT_SORTS = {
+    "date": [("date", ASCENDING), ("_id", ASCENDING)],
+    "id": [("_id", ASCENDING)],
+}
+
+# Only these fields leave the database for summary reads
+EVENT_SUMMARY_PROJECTION = projection_for(EventSummary)
+EVENT_SUMMARY_DEFAULTS = defaults_for(EventSummary)
+EVENT_PROJECTION = projection_for(Event)
+EVENT_DEFAULTS = defaults_for(Event)
+
+ATTENDEE_SORT = [("_id", ASCENDING)]
+
+TICKET_COUNTERS = {
+    "General": "general_attendee_count",
+    "VIP": "vip_attendee_count",
+}
+
+TICKET_CAPACITIES = {
+    "General": "general_capacity",
+    "VIP": "vip_capacity",
+}
 
 class EventService:
-    def __init__(self, db):
+    def __init__(self, db, user_service: Optional[UserService] = None, job_queue: Optional[JobQueue] = None):
         self.db = db
         self.events = db["events"]  # MongoDB collection
-        print("Event collection initialized")
+        self.registrations = db["registrations"]
+        self.user_service = user_service or UserService(db)
+        self.job_queue = job_queue or JobQueue(db)
+        self.inventory = InventoryService(db)
+
+    async def get_all_events(self, filters: dict = {}, limit: int = 20, cursor: Optional[str] = None, order_by: str = "date", full: bool = False, lean_docs: bool = False):
+        """
+        With lean_docs=True the page holds plain documents (shaped like the
+        models) for serialization with src.db.serialization, skipping validation.
+        """
+        sort = EVENT_SORTS[order_by]
+        query = keyset_filter(filters, sort, cursor)
+        projection, model = (None, Event) if full else (EVENT_SUMMARY_PROJECTION, EventSummary)
+        events = await self.events.find(query, projection).sort(sort).limit(limit + 1).to_list(length=limit + 1)
+        events, next_cursor = paginate(events, sort, limit)
 
-    async def get_all_events(self, filters: dict = {}):
-        events = await self.events.find(filters).to_list(length=10)
+        if lean_docs:
+            return {"events": lean(events, EVENT_SUMMARY_DEFAULTS if not full else EVENT_DEFAULTS), "next_cursor": next_cursor}
+        return {"events": [model(**event) for event in events], "next_cursor": next_cursor}
 
-        return [Event(**event) for event in events]
+    async def count_events(self, filters: dict = {}) -> int:
+        if not filters:
+            # Served from collection metadata, no scan at all
+            return await self.events.estimated_document_count()
+        return await self.events.count_documents(filters)
+
+    async def count_events_by_day(self, filters: dict = {}) -> dict[str, int]:
+        # Callers bound filters["date"]; unbounded this groups the whole collection
+        pipeline = [
+            {"$match": filters},
+            {"$project": {"_id": 0, "date": 1}},
+            {"$group": {"_id": {"$dateToString": {"format": "%Y-%m-%d", "date": "$date"}}, "count": {"$sum": 1}}},
+            {"$sort": {"_id": 1}},
+        ]
+        days = await self.events.aggregate(pipeline).to_list(length=None)
+        return {day["_id"]: day["count"] for day in days}
+
+    async def stream_events(self, filters: dict = {}, order_by: str = "date", batch_size: int = 500):
+        # Iterate the cursor batch by batch so exports never hold more than one batch in memory
+        cursor = self.events.find(filters, EVENT_PROJECTION).sort(EVENT_SORTS[order_by]).batch_size(batch_size)
+        async for event in cursor:
+            yield dumps({**EVENT_DEFAULTS, **event}) + b"\n"
     
+    async def search_events(self, query: str, filters: dict = {}, limit: int = 20, offset: int = 0):
+        """
+        Relevance-ranked $text search over name, description and location,
+        composed with the regular listing filters.
+        """
+        score = {"score": {"$meta": "textScore"}}
+        projection = {**EVENT_SUMMARY_PROJECTION, "description": 1, **score}
+        events = await self.events.find({"$text": {"$search": query}, **filters}, projection) \
+            .sort([("score", score["score"])]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
+
+        hits = [EventSearchHit(**event, highlights=highlight(event, query)) for event in events[:limit]]
+        return {"hits": hits, "next_offset": offset + limit if len(events) > limit else None}
+
+    async def suggest_events(self, prefix: str, filters: dict = {}, limit: int = 10):
+        # Earlier words must match whole terms; the last one is a prefix. An anchored
+        # regex on the multikey search_terms index is an index range scan.
+        words = [word[:MAX_TERM_LENGTH] for word in re.findall(r"\w+", prefix.lower())]
+        if not words:
+            return []
+        terms_filter = {"$regex": f"^{re.escape(words[-1])}"}
+        if words[:-1]:
+            terms_filter["$all"] = words[:-1]
+        query = {"search_terms": terms_filter, **filters}
+        events = await self.events.find(query, {"name": 1}).limit(limit).to_list(length=limit)
+        return [{"id": str(event["_id"]), "name": event["name"]} for event in events]
+
+    async def find_events_near(self, longitude: float, latitude: float, radius_m: float, filters: dict = {}, limit: int = 20, offset: int = 0):
+        """
+        Events within radius_m of the point, nearest first, in one indexed
+        $geoNear that also applies the regular listing filters.
+        """
+        pipeline = [
+            {"$geoNear": {
+                "near": {"type": "Point", "coordinates": [longitude, latitude]},
+                "key": "geo",
+                "distanceField": "distance_m",
+                "maxDistance": radius_m,
+                "spherical": True,
+                "query": filters,
+            }},
+            {"$skip": offset},
+            {"$limit": limit + 1},
+            {"$project": {**EVENT_SUMMARY_PROJECTION, "distance_m": 1}},
+        ]
+        events = await self.events.aggregate(pipeline).to_list(length=limit + 1)
+
+        hits = [EventNearbyHit(**event) for event in events[:limit]]
+        return {"hits": hits, "next_offset": offset + limit if len(events) > limit else None}
+
     async def create_event(self, event_data: EventCreateModel):
         event_dict = event_data.model_dump()
+        if event_dict["geo"] is None:
+            # Leave the field out so the event simply stays out of the 2dsphere index
+            del event_dict["geo"]
+        event_dict["search_terms"] = search_terms(event_dict["name"], event_dict["location"])
         event_dict["created_at"] = datetime.now()
-        event_dict["general_attendee_ids"] = []
-        event_dict["vip_attendee_ids"] = []
+        event_dict["general_attendee_count"] = 0
+        event_dict["vip_attendee_count"] = 0
 
         result = await self.events.insert_one(event_dict)
         event_dict["_id"] = result.inserted_id
+        for ticket_type, field in TICKET_CAPACITIES.items():
+            if event_dict[field] is not None:
+                await self.inventory.set_capacity(result.inserted_id, ticket_type, event_dict[field])
+        event_list_cache.invalidate()
 
         return Event(**event_dict)
     
-    async def get_event_by_id(self, event_id: str):
-        event = await self.events.find_one({"_id": ObjectId(event_id)})
-        return Event(**event)
-
-    async def attend_event(self, event_id: str, user_id: str, first_name: str, last_name: str, ticket_type: str):
-        user_service = UserService(self.db)
-        user = await user_service.get_user_by_id(user_id)
-        print("Found user")
-        event = await self.events.find_one({"_id": ObjectId(event_id)})
-        print("Found event")
-        ticket_token = await self._generate_ticket(event_id, user_id, first_name, last_name, ticket_type)
-        print("Ticket generated")
+    async def get_event_by_id(self, event_id: str, full: bool = True):
+        projection, model = (None, Event) if full else (EVENT_SUMMARY_PROJECTION, EventSummary)
+        event = await self.events.find_one({"_id": ObjectId(event_id)}, projection)
         if not event:
             raise HTTPException(status_code=404, detail="Event not found")
+        return model(**event)
+
+    async def get_events_by_ids(self, event_ids: list[str], full: bool = False):
+        """
+        Fetch several events in one $in query, in the caller's order.
+        Ids of deleted events are skipped.
+        """
+        ids = [ObjectId(event_id) for event_id in event_ids]
+        projection, model = (None, Event) if full else (EVENT_SUMMARY_PROJECTION, EventSummary)
+        events = await self.events.find({"_id": {"$in": ids}}, projection).to_list(length=len(ids))
+        by_id = {event["_id"]: model(**event) for event in events}
+
+        return [by_id[event_id] for event_id in ids if event_id in by_id]
+
+    async def get_events_page_by_ids(self, event_ids: list[str], limit: int = 20, offset: int = 0, descending: bool = False):
+        """
+        One page of the given events in a single $in query, sorted by date.
+        Ids of deleted events are skipped.
+        """
+        direction = DESCENDING if descending else ASCENDING
+        ids = [ObjectId(event_id) for event_id in event_ids]
+        events = await self.events.find({"_id": {"$in": ids}}, EVENT_SUMMARY_PROJECTION) \
+            .sort([("date", direction), ("_id", direction)]).skip(offset).limit(limit + 1).to_list(length=limit + 1)
 
-        if ticket_type == "General":
-            event["general_attendee_ids"].append(ObjectId(user_id))
-        elif ticket_type == "VIP":
-            event["vip_attendee_ids"].append(ObjectId(user_id))
-        else:
+        next_offset = offset + limit if len(events) > limit else None
+        return {"events": [EventSummary(**event) for event in events[:limit]], "next_offset": next_offset}
+
+    async def attend_event(
+        self,
+        event_id: str,
+        user_id: str,
+        first_name: str,
+        last_name: str,
+        ticket_type: str,
+        hold_id: Optional[str] = None,
+        session_id: Optional[str] = None,
+    ):
+        """
+        Record the registration; counting it against the event and issuing
+        the ticket are left to the issue_ticket job. Returns the pending
+        registration.
+
+        The seat comes from the checkout hold when one is given and still
+        live, otherwise from the event's inventory if the type has a capacity.
+        The registration stores the hold it was made from and the hold is only
+        converted once the registration is in, so an attempt cut off between
+        the two is finished by the next one instead of taking a second seat.
+        A repeat also requeues the registration's issue_ticket job, in case the
+        attempt that stored it died before queueing it. Paid registrations keep
+        their checkout session_id, and a repeat for a different session is only
+        answered with 409.
+        """
+        if ticket_type not in TICKET_COUNTERS:
             raise HTTPException(status_code=400, detail="Invalid ticket type")
-        
-        user.tickets[event_id] = ticket_token
-        await user_service.update_user(user, user.model_dump())
-        await self.events.update_one({"_id": ObjectId(event_id)}, {"$set": event})
-        return Event(**event)
+
+        capacity_field = TICKET_CAPACITIES[ticket_type]
+        event = await self.events.find_one({"_id": ObjectId(event_id)}, {capacity_field: 1})
+        if event is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+        limited = event.get(capacity_field) is not None
+
+        # Checked before any seat is taken, so a repeat never reserves or sells out
+        existing = await self.registrations.find_one({"event_id": event["_id"], "user_id": ObjectId(user_id)})
+        if existing is not None:
+            if hold_id and existing.get("hold_id") != ObjectId(hold_id):
+                # Registered without this checkout's hold; its seat is not needed
+                await self.inventory.release_hold(hold_id)
+            if session_id is None or existing.get("session_id") == session_id:
+                await self._resume_registration(existing, limited)
+            raise HTTPException(status_code=409, detail="User is already registered for this event")
+
+        hold = await self.inventory.get_live_hold(hold_id) if hold_id else None
+        shard = None
+        if hold is None and limited:
+            shard = await self.inventory.reserve(event["_id"], ticket_type)
+
+        registration = {
+            "event_id": event["_id"],
+            "user_id": ObjectId(user_id),
+            "ticket_type": ticket_type,
+            "ticket_id": str(uuid.uuid4()),
+            "ticket_token": None,
+            "first_name": first_name,
+            "last_name": last_name,
+            "hold_id": hold["_id"] if hold else None,
+            "seat_pending": hold is not None,
+            "counted": False,
+            "session_id": session_id,
+            "created_at": datetime.now(),
+        }
+
+        # The unique (event_id, user_id) index is the duplicate-registration guard
+        try:
+            await self.registrations.insert_one(registration)
+        except DuplicateKeyError:
+            await self.inventory.release(event["_id"], ticket_type, shard)
+            raise HTTPException(status_code=409, detail="User is already registered for this event")
+        except Exception:
+            # The insert may have landed before the error; only give back a seat no registration holds
+            if await self.registrations.find_one({"_id": registration["_id"]}, {"_id": 1}) is None:
+                await self.inventory.release(event["_id"], ticket_type, shard)
+            raise
+
+        if registration["seat_pending"]:
+            await self._seat_from_hold(registration, limited)
+
+        registration_id = await self._queue_issue(registration)
+        logger.info("Registered attendee", extra={"event_id": event_id, "user_id": user_id, "ticket_type": ticket_type})
+        return {"status": "pending", "registration_id": registration_id, "ticket_id": registration["ticket_id"]}
+
+    async def _seat_from_hold(self, registration: dict, limited: bool):
+        """
+        Convert the hold a registration was made from. Should the hold have
+        lapsed meanwhile, take a fresh seat instead; with none left the
+        registration is removed again and SoldOut raised.
+        """
+        converted = await self.inventory.convert_hold(registration["hold_id"], registration["_id"])
+        if not converted and limited:
+            try:
+                # A crash before seat_pending is cleared makes a retry reserve again: a lost seat, never an oversold one
+                await self.inventory.reserve(registration["event_id"], registration["ticket_type"])
+            except SoldOut:
+                await self.registrations.delete_one({"_id": registration["_id"]})
+                raise
+        await self.registrations.update_one({"_id": registration["_id"]}, {"$unset": {"seat_pending": ""}})
+
+    async def _resume_registration(self, registration: dict, limited: bool):
+        """Finish what an interrupted attempt left of an existing registration."""
+        if registration.get("seat_pending"):
+            await self._seat_from_hold(registration, limited)
+        # Keyed per registration, so this is a no-op unless the job was never queued
+        await self._queue_issue(registration)
+
+    async def _queue_issue(self, registration: dict) -> str:
+        registration_id = str(registration["_id"])
+        await self.job_queue.enqueue("issue_ticket", {"registration_id": registration_id}, key=f"issue_ticket:{registration_id}")
+        return registration_id
+
+    async def registered_from_session(self, event_id: str, user_id: str, session_id: str) -> bool:
+        registration = await self.registrations.find_one(
+            {"event_id": ObjectId(event_id), "user_id": ObjectId(user_id)}, {"session_id": 1}
+        )
+        return registration is not None and registration.get("session_id") == session_id
+
+    async def hold_ticket(self, event: EventSummary, user_id: str, ticket_type: str) -> dict:
+        """Reserve a seat for the user's checkout; see InventoryService.hold."""
+        if await self.registrations.find_one({"event_id": ObjectId(event.id), "user_id": ObjectId(user_id)}, {"_id": 1}):
+            raise HTTPException(status_code=409, detail="User is already registered for this event")
+        limited = getattr(event, TICKET_CAPACITIES[ticket_type]) is not None
+        return await self.inventory.hold(ObjectId(event.id), user_id, ticket_type, limited)
+
+    async def get_availability(self, event_id: str) -> dict:
+        event = await self.get_event_by_id(event_id, full=False)
+        available = await self.inventory.availability(ObjectId(event_id))
+        availability = {}
+        for ticket_type, field in TICKET_CAPACITIES.items():
+            capacity = getattr(event, field)
+            availability[ticket_type] = {
+                "capacity": capacity,
+                "available": available.get(ticket_type, 0) if capacity is not None else None,
+            }
+        return availability
+
+    async def issue_ticket(self, payload: dict):
+        """
+        Job handler: count a registration against its event, sign its ticket
+        and hand it to the user, then queue its PDF pre-render and the
+        confirmation. Safe to repeat.
+        """
+        registration = await self.registrations.find_one({"_id": ObjectId(payload["registration_id"])})
+        if registration is None:
+            # Event deleted since; nothing to issue
+            return
+        event = await self.events.find_one({"_id": registration["event_id"]}, {"name": 1, "date": 1, "location": 1})
+        if event is None:
+            # The event was deleted while registering
+            await self.registrations.delete_one({"_id": registration["_id"]})
+            return
+
+        # Registrations from before the flag were counted when they were stored
+        if registration.get("counted") is False:
+            await self._count_registration(registration)
+
+        ticket_token = registration["ticket_token"]
+        if ticket_token is None:
+            ticket_token = self._generate_ticket(
+                event,
+                registration["ticket_id"],
+                str(registration["user_id"]),
+                registration["first_name"],
+                registration["last_name"],
+                registration["ticket_type"],
+            )
+            result = await self.registrations.update_one(
+                {"_id": registration["_id"], "ticket_token": None},
+                {"$set": {"ticket_token": ticket_token, "issued_at": datetime.now()}},
+            )
+            if result.modified_count == 0:
+                # A concurrent attempt issued first; its token wins
+                issued = await self.registrations.find_one({"_id": registration["_id"]}, {"ticket_token": 1})
+                if issued is None:
+                    return
+                ticket_token = issued["ticket_token"]
+
+        await self.user_service.add_ticket(str(registration["user_id"]), str(registration["event_id"]), ticket_token)
+
+        ticket_id = registration["ticket_id"]
+        await self.job_queue.enqueue("render_ticket", {"ticket_token": ticket_token}, key=f"render_ticket:{ticket_id}")
+        await self.job_queue.enqueue(
+            "notify_registration", {"registration_id": payload["registration_id"]}, key=f"notify_registration:{ticket_id}"
+        )
+
+    async def _count_registration(self, registration: dict):
+        # Claiming the flag first makes concurrent attempts count once; a failed $inc hands it back for the retry
+        claimed = await self.registrations.update_one({"_id": registration["_id"], "counted": False}, {"$set": {"counted": True}})
+        if claimed.modified_count == 0:
+            return
+        try:
+            await self.events.update_one(
+                {"_id": registration["event_id"]}, {"$inc": {TICKET_COUNTERS[registration["ticket_type"]]: 1}}
+            )
+        except BaseException:
+            # Also when cut off at the job's visibility timeout
+            await self.registrations.update_one({"_id": registration["_id"]}, {"$set": {"counted": False}})
+            raise
+
+    async def notify_registration(self, payload: dict):
+        """
+        Job handler: confirm an issued ticket to its holder. There is no mail
+        transport yet, so the confirmation is only logged.
+        """
+        registration = await self.registrations.find_one(
+            {"_id": ObjectId(payload["registration_id"])}, {"event_id": 1, "user_id": 1, "ticket_type": 1}
+        )
+        if registration is None:
+            return
+        event = await self.events.find_one({"_id": registration["event_id"]}, {"name": 1, "date": 1})
+        user = await self.user_service.get_user_by_id(str(registration["user_id"]))
+        if event is None or user is None:
+            return
+
+        logger.info(
+            "Registration confirmation for %s", event["name"],
+            extra={"user_id": str(user.id), "email": user.email, "event_id": str(event["_id"]), "ticket_type": registration["ticket_type"]},
+        )
+
+    async def get_attendees(self, event_id: str, ticket_type: Optional[str] = None, limit: int = 50, cursor: Optional[str] = None):
+        filters = {"event_id": ObjectId(event_id)}
+        if ticket_type:
+            filters["ticket_type"] = ticket_type
+
+        query = keyset_filter(filters, ATTENDEE_SORT, cursor)
+        registrations = await self.registrations.find(query, {"ticket_token": 0}) \
+            .sort(ATTENDEE_SORT).limit(limit + 1).to_list(length=limit + 1)
+        registrations, next_cursor = paginate(registrations, ATTENDEE_SORT, limit)
+
+        return {"attendees": [Registration(**r) for r in registrations], "next_cursor": next_cursor}
     
     async def update_event(self, event_id: str, event_data: EventCreateModel):
         event_dict = event_data.model_dump()
         event_dict["updated_at"] = datetime.now()
-        await self.events.update_one({"_id": ObjectId(event_id)}, {"$set": event_dict})
-        return Event(**event_dict)
+        event_dict["search_terms"] = search_terms(event_dict["name"], event_dict["location"])
+        before = await self.events.find_one_and_update(
+            {"_id": ObjectId(event_id)},
+            {"$set": event_dict},
+            return_document=ReturnDocument.BEFORE,
+        )
+        if before is None:
+            raise HTTPException(status_code=404, detail="Event not found")
+
+        for ticket_type, field in TICKET_CAPACITIES.items():
+            if before.get(field) != event_dict[field]:
+                await self.inventory.set_capacity(before["_id"], ticket_type, event_dict[field])
+
+        event_list_cache.invalidate()
+        return Event(**{**before, **event_dict})
     
     async def delete_event(self, event_id: str):
         await self.events.delete_one({"_id": ObjectId(event_id)})
+        await self.registrations.delete_many({"event_id": ObjectId(event_id)})
+        await self.inventory.delete_event(ObjectId(event_id))
+        event_list_cache.invalidate()
         return {"message": "Event deleted successfully"}
     
-    async def _generate_ticket(self, event_id: str, user_id: str, first_name: str, last_name: str, ticket_type: str):
-        ticket_id = str(uuid.uuid4())
-        event = await self.get_event_by_id(event_id)
+    def _generate_ticket(self, event: dict, ticket_id: str, user_id: str, first_name: str, last_name: str, ticket_type: str):
         ticket_data = {
             "ticket_id": ticket_id,
-            "event_id": event_id,
+            "event_id": str(event["_id"]),
             "user_id": user_id,
             "first_name": first_name,
             "last_name": last_name,
             "ticket_type": ticket_type,
-            "event_name": event.name,
-            "event_date": event.date,
-            "event_location": event.location
+            "event_name": event["name"],
+            "event_date": event["date"],
+            "event_location": event["location"]
         }
         ticket_generator = TicketService()
         token = ticket_generator.generate_ticket_token(ticket_data)
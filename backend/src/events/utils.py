@@ -5,12 +5,32 @@ import jwt
 import io
 
 
-class TicketService:
-    def __init__(self):
-        self.pdf = FPDF()
-        self.pdf.add_page()
-        self.pdf.set_font("Arial", size=12)
+# Pre-built ticket layout: (font style, font size, text template) per centred line
+TICKET_LAYOUT = [
+    ("B", 16, "{event_name}"),
+    ("", 12, "Date: {event_date}"),
+    ("", 12, "Location: {event_location}"),
+    ("B", 12, "Ticket ID:"),
+    ("", 12, "{ticket_id}"),
+    ("B", 12, "Ticket Type:"),
+    ("", 12, "{ticket_type}"),
+    ("B", 12, "Ticket Holder:"),
+    ("", 12, "{first_name} {last_name}"),
+]
+
+
+def render_ticket_pdf(ticket_data: dict) -> bytes:
+    # Module-level so it can run in a worker process
+    pdf = FPDF()
+    pdf.add_page()
+    for style, size, template in TICKET_LAYOUT:
+        pdf.set_font("Arial", size=size, style=style)
+        pdf.cell(200, 10, txt=template.format(**ticket_data), ln=True, align="C")
+
+    return pdf.output(dest='S').encode('latin1')  # Generate PDF as bytes
+
 
+class TicketService:
     def generate_ticket_token(self, ticket_data: dict):
         payload = {
             "ticket_id": ticket_data["ticket_id"],
@@ -40,31 +60,8 @@ class TicketService:
     def generate_ticket_and_save(self, token: str):
         ticket_data = self.verify_ticket_token(token)
 
-        self.pdf.set_font("Arial", size=16, style="B")
-        self.pdf.cell(200, 10, txt=ticket_data["event_name"], ln=True, align="C")
-        self.pdf.set_font("Arial", size=12)
-        self.pdf.cell(200, 10, txt=f"Date: {ticket_data['event_date']}", ln=True, align="C")
-        self.pdf.cell(200, 10, txt=f"Location: {ticket_data['event_location']}", ln=True, align="C")
-
-        self.pdf.set_font("Arial", size=12, style="B")
-        self.pdf.cell(200, 10, txt="Ticket ID:", ln=True, align="C")
-        self.pdf.set_font("Arial", size=12)
-        self.pdf.cell(200, 10, txt=ticket_data["ticket_id"], ln=True, align="C")
-
-        self.pdf.set_font("Arial", size=12, style="B")
-        self.pdf.cell(200, 10, txt="Ticket Type:", ln=True, align="C")
-        self.pdf.set_font("Arial", size=12)
-        self.pdf.cell(200, 10, txt=ticket_data["ticket_type"], ln=True, align="C")
-
-        self.pdf.set_font("Arial", size=12, style="B")
-        self.pdf.cell(200, 10, txt="Ticket Holder:", ln=True, align="C")
-        self.pdf.set_font("Arial", size=12)
-        self.pdf.cell(200, 10, txt=f"{ticket_data['first_name']} {ticket_data['last_name']}", ln=True, align="C")
-
         # Create an in-memory PDF file
-        pdf_bytes = io.BytesIO()
-        pdf_content = self.pdf.output(dest='S').encode('latin1')  # Generate PDF as bytes
-        pdf_bytes.write(pdf_content)
+        pdf_bytes = io.BytesIO(render_ticket_pdf(ticket_data))
         pdf_bytes.seek(0)  # Set cursor to start of the file
 
         return pdf_bytes
@@ -0,0 +1,292 @@
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Optional
+
+from pymongo import ASCENDING, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from src.config import Config
+from src.metrics import Counter, Gauge, Histogram, registry
+
+logger = logging.getLogger(__name__)
+
+JOB_WAIT = registry.register(Histogram(
+    "job_wait_seconds", "Time from a job becoming due to its first attempt", ("kind",),
+    (0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 15.0, 60.0, 300.0, 900.0),
+))
+JOB_DURATION = registry.register(Histogram(
+    "job_duration_seconds", "Handler run time per attempt", ("kind", "outcome"),
+))
+JOBS_PROCESSED = registry.register(Counter(
+    "jobs_processed_total", "Job attempts by outcome", ("kind", "outcome"),
+))
+JOB_DEPTH = registry.register(Gauge(
+    "job_queue_depth", "Jobs waiting, running or parked as failed", ("kind", "status"),
+))
+JOB_OLDEST = registry.register(Gauge(
+    "job_queue_oldest_seconds", "Age of the oldest job that is due but not yet done", ("kind",),
+))
+
+Handler = Callable[[dict], Awaitable[None]]
+
+
+def parse_concurrency(value: str) -> dict[str, int]:
+    """Parse "issue_ticket=8,render_ticket=2" into {"issue_ticket": 8, "render_ticket": 2}."""
+    limits = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        kind, _, limit = item.partition("=")
+        limits[kind.strip()] = int(limit)
+    return limits
+
+
+@dataclass
+class JobKind:
+    handler: Handler
+    concurrency: int
+    visibility_timeout: float
+    max_attempts: int
+    on_failure: Optional[Callable[[dict, str], Awaitable[None]]] = None
+    every: Optional[float] = None
+
+
+class JobQueue:
+    """
+    Durable background jobs in the `jobs` collection, worked by asyncio tasks.
+
+    Delivery is at-least-once. Claiming a job hides it for the kind's
+    visibility timeout; a handler that crashes, or a process that dies, leaves
+    the job to reappear once that lapses, and handlers are cut off at the
+    timeout so two workers never run the same job at once. Handlers must
+    therefore be idempotent. Failures are retried with jittered exponential
+    backoff until max_attempts, after which the job is parked as "failed".
+
+    Each registered kind gets `concurrency` workers per process, so limits
+    multiply with the number of processes running workers.
+
+    Periodic kinds are queued by a scheduler loop in every started process.
+    Runs are keyed by time slot, so each slot still runs once however many
+    processes schedule it, and a failed enqueue is simply tried again.
+    """
+
+    def __init__(self, db, concurrency: Optional[dict[str, int]] = None):
+        self.jobs = db["jobs"]
+        self.concurrency = concurrency if concurrency is not None else parse_concurrency(Config.JOB_CONCURRENCY)
+        self.kinds: dict[str, JobKind] = {}
+        self._wakeups: dict[str, asyncio.Event] = {}
+        self._tasks: list[asyncio.Task] = []
+        self._running: dict[str, int] = {}
+        self._depth: dict[str, dict] = {}
+
+    def register(
+        self,
+        kind: str,
+        handler: Handler,
+        visibility_timeout: float = None,
+        max_attempts: int = None,
+        on_failure: Optional[Callable[[dict, str], Awaitable[None]]] = None,
+        every: Optional[float] = None,
+    ) -> None:
+        """
+        on_failure(payload, error) runs once a job has used up its attempts.
+        With every, a job of this kind with an empty payload is also queued
+        every that many seconds.
+        """
+        self.kinds[kind] = JobKind(
+            handler=handler,
+            concurrency=self.concurrency.get(kind, Config.JOB_DEFAULT_CONCURRENCY),
+            visibility_timeout=visibility_timeout or Config.JOB_VISIBILITY_TIMEOUT_SECONDS,
+            max_attempts=max_attempts or Config.JOB_MAX_ATTEMPTS,
+            on_failure=on_failure,
+            every=every,
+        )
+
+    async def enqueue(self, kind: str, payload: dict, delay: float = 0, key: Optional[str] = None) -> bool:
+        """
+        Store a job for later. With a key, the job is only stored if no job
+        with that key exists yet; returns False for such duplicates.
+        """
+        due = datetime.now() + timedelta(seconds=delay)
+        job = {
+            "kind": kind,
+            "payload": payload,
+            "status": "queued",
+            "attempts": 0,
+            "created_at": datetime.now(),
+            "due_at": due,
+            "available_at": due,
+        }
+        if key is not None:
+            job["_id"] = key
+        try:
+            await self.jobs.insert_one(job)
+        except DuplicateKeyError:
+            return False
+
+        wakeup = self._wakeups.get(kind)
+        if wakeup is not None and not delay:
+            wakeup.set()
+        return True
+
+    async def start(self, workers: bool = True):
+        """Start the depth watcher, the scheduler and, unless workers is False, the workers."""
+        for kind, spec in self.kinds.items():
+            self._wakeups[kind] = asyncio.Event()
+            self._running[kind] = 0
+            if workers:
+                self._tasks += [asyncio.create_task(self._work(kind)) for _ in range(spec.concurrency)]
+        self._tasks.append(asyncio.create_task(self._watch_depth()))
+        if any(spec.every for spec in self.kinds.values()):
+            self._tasks.append(asyncio.create_task(self._schedule()))
+
+    async def stop(self):
+        # Jobs cut off here become visible again once their timeout lapses
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def drain(self, kinds: Optional[list[str]] = None):
+        """
+        Run every job that is due in the calling task until none are left.
+        For scripts and benchmarks that do not start workers.
+        """
+        kinds = kinds or list(self.kinds)
+        progressed = True
+        while progressed:
+            progressed = False
+            for kind in kinds:
+                while (job := await self._claim(kind)) is not None:
+                    await self._run(kind, job)
+                    progressed = True
+
+    async def _claim(self, kind: str) -> Optional[dict]:
+        now = datetime.now()
+        spec = self.kinds[kind]
+        return await self.jobs.find_one_and_update(
+            {"kind": kind, "status": {"$in": ["queued", "running"]}, "available_at": {"$lte": now}},
+            {
+                "$set": {
+                    "status": "running",
+                    "started_at": now,
+                    "available_at": now + timedelta(seconds=spec.visibility_timeout),
+                },
+                "$inc": {"attempts": 1},
+            },
+            sort=[("available_at", ASCENDING)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def _run(self, kind: str, job: dict):
+        spec = self.kinds[kind]
+        if job["attempts"] == 1:
+            JOB_WAIT.observe((kind,), (job["started_at"] - job["due_at"]).total_seconds())
+
+        # Only the holder of this attempt may settle the job
+        claim = {"_id": job["_id"], "attempts": job["attempts"]}
+        extra = {"job_id": str(job["_id"]), "job_kind": kind, "attempt": job["attempts"]}
+        self._running[kind] = self._running.get(kind, 0) + 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(spec.handler(job["payload"]), timeout=spec.visibility_timeout)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            JOB_DURATION.observe((kind, "error"), time.perf_counter() - started)
+
+            if job["attempts"] >= spec.max_attempts:
+                JOBS_PROCESSED.inc((kind, "failed"))
+                logger.exception("Job failed permanently", extra=extra)
+                await self.jobs.update_one(claim, {"$set": {"status": "failed", "finished_at": datetime.now(), "error": error}})
+                if spec.on_failure is not None:
+                    await spec.on_failure(job["payload"], error)
+            else:
+                JOBS_PROCESSED.inc((kind, "retried"))
+                logger.warning("Job failed, will retry", exc_info=True, extra=extra)
+                backoff = min(Config.JOB_RETRY_MAX_SECONDS, Config.JOB_RETRY_BASE_SECONDS * 2 ** (job["attempts"] - 1))
+                retry_at = datetime.now() + timedelta(seconds=random.uniform(backoff / 2, backoff))
+                await self.jobs.update_one(claim, {"$set": {"status": "queued", "available_at": retry_at, "error": error}})
+        else:
+            JOB_DURATION.observe((kind, "done"), time.perf_counter() - started)
+            JOBS_PROCESSED.inc((kind, "done"))
+            await self.jobs.update_one(claim, {"$set": {"status": "done", "finished_at": datetime.now()}})
+        finally:
+            self._running[kind] -= 1
+
+    async def _work(self, kind: str):
+        wakeup = self._wakeups[kind]
+        while True:
+            try:
+                job = await self._claim(kind)
+            except Exception:
+                logger.exception("Could not claim job", extra={"job_kind": kind})
+                job = None
+
+            if job is None:
+                wakeup.clear()
+                try:
+                    await asyncio.wait_for(wakeup.wait(), Config.JOB_POLL_INTERVAL_SECONDS)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            try:
+                await self._run(kind, job)
+            except Exception:
+                logger.exception("Job worker error", extra={"job_kind": kind})
+
+    async def _schedule(self):
+        periodic = {kind: spec.every for kind, spec in self.kinds.items() if spec.every}
+        while True:
+            for kind, every in periodic.items():
+                slot = int(time.time() // every) + 1
+                try:
+                    await self.enqueue(kind, {}, delay=slot * every - time.time(), key=f"{kind}:{slot}")
+                except Exception:
+                    logger.exception("Could not schedule periodic job", extra={"job_kind": kind})
+            # Twice per slot, so one failed enqueue still leaves time to queue the slot
+            await asyncio.sleep(min(periodic.values()) / 2)
+
+    async def _watch_depth(self):
+        while True:
+            try:
+                await self.refresh_depth()
+            except Exception:
+                logger.exception("Could not read job queue depth")
+            await asyncio.sleep(Config.JOB_POLL_INTERVAL_SECONDS * 15)
+
+    async def refresh_depth(self) -> dict:
+        now = datetime.now()
+        rows = await self.jobs.aggregate([
+            {"$match": {"status": {"$in": ["queued", "running", "failed"]}}},
+            {"$group": {"_id": {"kind": "$kind", "status": "$status"}, "count": {"$sum": 1}, "oldest": {"$min": "$due_at"}}},
+        ]).to_list(length=None)
+
+        depth: dict[str, dict] = {}
+        for row in rows:
+            kind, status = row["_id"]["kind"], row["_id"]["status"]
+            entry = depth.setdefault(kind, {"queued": 0, "running": 0, "failed": 0, "oldest_seconds": 0.0})
+            entry[status] = row["count"]
+            if status != "failed":
+                entry["oldest_seconds"] = max(entry["oldest_seconds"], max((now - row["oldest"]).total_seconds(), 0))
+
+        for kind in set(self.kinds) | set(self._depth) | set(depth):
+            entry = depth.get(kind, {"queued": 0, "running": 0, "failed": 0, "oldest_seconds": 0.0})
+            for status in ("queued", "running", "failed"):
+                JOB_DEPTH.set((kind, status), entry[status])
+            JOB_OLDEST.set((kind,), entry["oldest_seconds"])
+        self._depth = depth
+        return depth
+
+    def stats(self) -> dict:
+        stats = {}
+        for kind in sorted(set(self.kinds) | set(self._depth)):
+            depth = self._depth.get(kind, {})
+            stats[f"{kind}_queued"] = depth.get("queued", 0)
+            stats[f"{kind}_failed"] = depth.get("failed", 0)
+            stats[f"{kind}_oldest_seconds"] = depth.get("oldest_seconds", 0.0)
+            stats[f"{kind}_in_progress"] = self._running.get(kind, 0)
+            stats[f"{kind}_workers"] = self.kinds[kind].concurrency if kind in self.kinds else 0
+        return stats
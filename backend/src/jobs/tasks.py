@@ -0,0 +1,25 @@
+from src.config import Config
+from src.events.rendering import ticket_renderer
+
+from .queue import JobQueue
+
+
+async def prerender_ticket(payload: dict):
+    # Fills the shared disk cache, so the holder's first download is a cache hit
+    await ticket_renderer.render(payload["ticket_token"], remember=False)
+
+
+def register_tasks(job_queue: JobQueue, services) -> None:
+    inventory = services.event_service.inventory
+
+    async def release_expired_holds(payload: dict):
+        await inventory.release_expired_holds()
+
+    job_queue.register("issue_ticket", services.event_service.issue_ticket)
+    job_queue.register("render_ticket", prerender_ticket)
+    job_queue.register("notify_registration", services.event_service.notify_registration)
+    job_queue.register("fulfill_payment", services.fulfillment.fulfill, on_failure=services.fulfillment.give_up)
+    # A failed sweep is not retried; the next slot picks up where it left off
+    job_queue.register(
+        "release_expired_holds", release_expired_holds, max_attempts=1, every=Config.HOLD_REAPER_INTERVAL_SECONDS
+    )
@@ -0,0 +1,44 @@
+"""
+Run background job workers without the web app, so job throughput scales
+separately from request handling. Set RUN_JOB_WORKERS=false on the web
+processes once these are deployed.
+
+    cd backend && python -m src.jobs.worker
+"""
+import asyncio
+import logging
+
+from src.db.main import DATABASE_NAME, create_client
+from src.events.rendering import ticket_renderer
+from src.logger import setup_logging
+from src.services import create_services
+
+logger = logging.getLogger(__name__)
+
+
+async def run():
+    client = create_client()
+    services = create_services(client[DATABASE_NAME])
+    await services.jobs.start()
+    logger.info("Job workers started", extra={"kinds": sorted(services.jobs.kinds)})
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await services.jobs.stop()
+        client.close()
+        await services.close()
+        ticket_renderer.shutdown()
+
+
+def main():
+    listener = setup_logging()
+    try:
+        asyncio.run(run())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        listener.stop()
+
+
+if __name__ == "__main__":
+    main()
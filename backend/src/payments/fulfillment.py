@@ -0,0 +1,145 @@
+import logging
+from datetime import datetime, timedelta
+from typing import Optional
+
+from fastapi import HTTPException
+from pymongo.errors import DuplicateKeyError
+
+from src.config import Config
+from src.errors import SoldOut
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_METADATA = ("user_id", "event_id", "ticket_type")
+
+
+class PaymentFulfillment:
+    """
+    Turns paid checkout sessions into registrations off the request path.
+
+    Every session is recorded once in `payment_sessions`, keyed by its Stripe
+    id, and fulfilled by a fulfill_payment job keyed the same way, so repeat
+    webhook deliveries neither record nor queue a session twice. The job may
+    still run more than once; a repeat finds the session fulfilled, or finds
+    the registration an earlier attempt stored and has attend_event finish
+    its seat and requeue its ticket before marking the session fulfilled.
+    A user already registered through another session paid twice; that
+    session fails so the payment gets refunded.
+    """
+
+    def __init__(self, db, event_service, user_service, job_queue):
+        self.sessions = db["payment_sessions"]
+        self.event_service = event_service
+        self.user_service = user_service
+        self.job_queue = job_queue
+        self.counters = {
+            "received_total": 0,
+            "duplicates_total": 0,
+            "fulfilled_total": 0,
+            "failed_total": 0,
+        }
+
+    async def accept(self, session: dict) -> bool:
+        """
+        Record a paid checkout session and queue its fulfillment.
+        Returns False when the session was already recorded or is not ours.
+        """
+        metadata = session.get("metadata") or {}
+        if not all(metadata.get(key) for key in REQUIRED_METADATA):
+            logger.warning("Checkout session without registration metadata", extra={"session_id": session.get("id")})
+            return False
+
+        now = datetime.now()
+        recorded = True
+        try:
+            await self.sessions.insert_one({
+                "_id": session["id"],
+                "status": "pending",
+                "user_id": metadata["user_id"],
+                "event_id": metadata["event_id"],
+                "ticket_type": metadata["ticket_type"],
+                "hold_id": metadata.get("hold_id"),
+                "amount_total": session.get("amount_total"),
+                "received_at": now,
+                "updated_at": now,
+            })
+        except DuplicateKeyError:
+            self.counters["duplicates_total"] += 1
+            recorded = False
+        else:
+            self.counters["received_total"] += 1
+
+        # Also on duplicates: covers a crash between recording and queueing
+        await self.job_queue.enqueue("fulfill_payment", {"session_id": session["id"]}, key=f"fulfill_payment:{session['id']}")
+        return recorded
+
+    async def get_status(self, session_id: str) -> Optional[str]:
+        session = await self.sessions.find_one({"_id": session_id}, {"status": 1})
+        return session["status"] if session else None
+
+    async def _finish(self, session_id: str, status: str, error: Optional[str] = None):
+        update = {"status": status, "updated_at": datetime.now()}
+        if error:
+            update["error"] = error
+        await self.sessions.update_one({"_id": session_id}, {"$set": update})
+
+    async def fulfill(self, payload: dict):
+        """Job handler for fulfill_payment."""
+        session_id = payload["session_id"]
+        session = await self.sessions.find_one({"_id": session_id})
+        if session is None or session["status"] != "pending":
+            return
+
+        extra = {"session_id": session_id, "event_id": session["event_id"], "user_id": session["user_id"]}
+        try:
+            user = await self.user_service.get_user_by_id(session["user_id"])
+            if user is None:
+                raise HTTPException(status_code=404, detail="User not found")
+            await self.event_service.attend_event(
+                session["event_id"],
+                session["user_id"],
+                user.first_name,
+                user.last_name,
+                session["ticket_type"],
+                hold_id=session.get("hold_id"),
+                session_id=session_id,
+            )
+        except SoldOut:
+            # Paid after the hold lapsed and the seat was sold on; the payment needs a refund
+            self.counters["failed_total"] += 1
+            logger.error("Paid registration sold out after its hold expired", extra=extra)
+            await self._finish(session_id, "failed", "Sold out")
+            return
+        except HTTPException as e:
+            resumed = e.status_code == 409 and await self.event_service.registered_from_session(
+                session["event_id"], session["user_id"], session_id
+            )
+            if not resumed:
+                # Retrying will not help; leave the session for manual follow-up and refund
+                error = "Already registered" if e.status_code == 409 else str(e.detail)
+                self.counters["failed_total"] += 1
+                logger.error("Payment fulfillment failed: %s", error, extra=extra)
+                await self._finish(session_id, "failed", error)
+                return
+            # An earlier attempt for this session registered the user before it was interrupted; attend_event resumed it
+
+        self.counters["fulfilled_total"] += 1
+        logger.info("Fulfilled paid registration", extra=extra)
+        await self._finish(session_id, "fulfilled")
+
+    async def expire(self, session: dict):
+        """An unpaid checkout session expired: give its seat back now rather than at hold expiry."""
+        hold_id = (session.get("metadata") or {}).get("hold_id")
+        if not hold_id or not session.get("expires_at"):
+            return
+        # A hold extended by a newer checkout of the same user outlives this session; leave it alone
+        covered_until = datetime.fromtimestamp(session["expires_at"]) + timedelta(seconds=Config.HOLD_GRACE_SECONDS + 60)
+        await self.event_service.inventory.release_hold(hold_id, expiring_before=covered_until)
+
+    async def give_up(self, payload: dict, error: str):
+        """Job failure hook: the job ran out of attempts."""
+        self.counters["failed_total"] += 1
+        await self._finish(payload["session_id"], "failed", error)
+
+    def stats(self) -> dict:
+        return dict(self.counters)
@@ -1,30 +1,73 @@
-import stripe
+import logging
+
 from fastapi import APIRouter, Request, Depends, HTTPException
-from src.db.main import get_db
-from src.events.service import EventService
 from src.config import Config
+from src.services import get_payment_fulfillment, get_stripe_service
+from .fulfillment import PaymentFulfillment
+from .stripe_service import StripeService
+from .webhooks import verify_webhook
+
+logger = logging.getLogger(__name__)
 
 payments_router = APIRouter()
 
+# Sessions paid by delayed methods complete unpaid and succeed later
+FULFILLMENT_EVENTS = {"checkout.session.completed", "checkout.session.async_payment_succeeded"}
+
+@payments_router.post("/webhook")
+async def stripe_webhook(
+    request: Request,
+    fulfillment: PaymentFulfillment = Depends(get_payment_fulfillment),
+):
+    """
+    Stripe delivery endpoint. Only records the session and queues a job for it,
+    so the acknowledgement goes back within Stripe's timeout however busy
+    fulfillment is.
+    """
+    payload = await request.body()
+    event = verify_webhook(
+        payload,
+        request.headers.get("Stripe-Signature"),
+        Config.STRIPE_WEBHOOK_SECRET,
+        Config.STRIPE_WEBHOOK_TOLERANCE_SECONDS,
+    )
+
+    if event.get("type") in FULFILLMENT_EVENTS:
+        session = event["data"]["object"]
+        if session.get("payment_status") == "paid":
+            await fulfillment.accept(session)
+    elif event.get("type") == "checkout.session.expired":
+        await fulfillment.expire(event["data"]["object"])
+
+    return {"received": True}
+
 @payments_router.get("/success")
-async def payment_success(session_id: str, db=Depends(get_db)):
-    try:
-        stripe.api_key = Config.STRIPE_SECRET_KEY
-        session = stripe.checkout.Session.retrieve(session_id)
+async def payment_success(
+    session_id: str,
+    fulfillment: PaymentFulfillment = Depends(get_payment_fulfillment),
+    stripe_service: StripeService = Depends(get_stripe_service),
+):
+    """
+    Where Stripe sends the customer after checkout. Registration happens in a
+    background job; this only reports on it, so refreshing is harmless.
+    """
+    status = await fulfillment.get_status(session_id)
 
+    if status is None:
+        # The webhook has not arrived yet; confirm with Stripe and queue the session ourselves
+        session = await stripe_service.retrieve_checkout_session(session_id)
         metadata = session.get("metadata", {})
-        user_email = metadata.get("user_email")
-        user_id = metadata.get("user_id")
-        event_id = metadata.get("event_id")
-        ticket_type = metadata.get("ticket_type")
-
-        if not (user_email and event_id):
+        if not (metadata.get("user_id") and metadata.get("event_id")):
             raise HTTPException(status_code=400, detail="Missing metadata")
+        if session.get("payment_status") != "paid":
+            raise HTTPException(status_code=402, detail="Payment not completed")
 
-        event_service = EventService(db)
-        await event_service.attend_event(event_id, user_id=user_id, ticket_type=ticket_type)
+        await fulfillment.accept(session)
+        status = await fulfillment.get_status(session_id)
 
+    if status == "fulfilled":
         return {"status": "success", "message": "Registration completed."}
-
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+    if status == "failed":
+        logger.error("Paid session could not be fulfilled", extra={"session_id": session_id})
+        raise HTTPException(status_code=500, detail="Registration could not be completed")
+    return {"status": "processing", "message": "Payment received, your ticket is being issued."}
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+import random
+import time
+import uuid
+from typing import Optional
+
+import httpx
+from fastapi import HTTPException
+
+from src.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+def encode_form(params: dict, prefix: Optional[str] = None) -> list[tuple[str, str]]:
+    """Flatten nested params into Stripe's bracketed form encoding."""
+    items = []
+    for key, value in params.items():
+        name = f"{prefix}[{key}]" if prefix else key
+        if value is None:
+            continue
+        if isinstance(value, dict):
+            items += encode_form(value, name)
+        elif isinstance(value, (list, tuple)):
+            items += encode_form({str(i): v for i, v in enumerate(value)}, name)
+        elif isinstance(value, bool):
+            items.append((name, "true" if value else "false"))
+        else:
+            items.append((name, str(value)))
+    return items
+
+
+class StripeClient:
+    """
+    Async Stripe API client over one persistent, connection-pooled HTTP session.
+    Network errors, 409, 429 and 5xx responses are retried with full-jitter
+    exponential backoff; POSTs carry an idempotency key so retries are safe.
+    """
+
+    RETRY_STATUSES = {409, 429, 500, 502, 503, 504}
+
+    def __init__(
+        self,
+        api_key: str,
+        base_url: str = "https://api.stripe.com",
+        timeout: float = 10.0,
+        max_retries: int = 2,
+        max_connections: int = 20,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.max_retries = max_retries
+        self._client = httpx.AsyncClient(
+            base_url=base_url,
+            auth=(api_key, ""),
+            timeout=timeout,
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            transport=transport,
+        )
+        self.metrics: dict[str, dict] = {}
+
+    def _record(self, operation: str, seconds: float, ok: bool, retried: bool):
+        stats = self.metrics.setdefault(
+            operation, {"count": 0, "errors": 0, "retries": 0, "total_ms": 0.0, "max_ms": 0.0}
+        )
+        stats["count"] += 1
+        stats["errors"] += 0 if ok else 1
+        stats["retries"] += 1 if retried else 0
+        stats["total_ms"] += seconds * 1000
+        stats["max_ms"] = max(stats["max_ms"], seconds * 1000)
+
+    @staticmethod
+    def _backoff(attempt: int) -> float:
+        return random.uniform(0, min(2.0, 0.25 * 2 ** attempt))
+
+    async def _request(self, operation: str, method: str, path: str, params: Optional[dict] = None, timeout: Optional[float] = None) -> dict:
+        headers = {}
+        if method == "POST":
+            headers["Idempotency-Key"] = str(uuid.uuid4())
+        data = encode_form(params) if params else None
+        request_timeout = timeout if timeout is not None else httpx.USE_CLIENT_DEFAULT
+
+        for attempt in range(self.max_retries + 1):
+            retrying = attempt < self.max_retries
+            started = time.perf_counter()
+            try:
+                response = await self._client.request(method, path, data=data, headers=headers, timeout=request_timeout)
+            except httpx.TransportError as e:
+                self._record(operation, time.perf_counter() - started, ok=False, retried=retrying)
+                if not retrying:
+                    logger.error("Stripe %s failed: %s", operation, e)
+                    raise HTTPException(status_code=502, detail=f"Stripe unreachable: {e}")
+                logger.warning("Retrying Stripe %s after %s", operation, type(e).__name__)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            ok = response.status_code < 400
+            should_retry = response.headers.get("Stripe-Should-Retry")
+            retryable = should_retry == "true" or (should_retry is None and response.status_code in self.RETRY_STATUSES)
+            self._record(operation, time.perf_counter() - started, ok=ok, retried=retrying and retryable)
+
+            if ok:
+                return response.json()
+            if retryable and retrying:
+                logger.warning("Retrying Stripe %s after HTTP %s", operation, response.status_code)
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text
+            logger.error("Stripe %s returned HTTP %s: %s", operation, response.status_code, message)
+            raise HTTPException(status_code=502, detail=f"Stripe error: {message}")
+
+    async def create_checkout_session(self, timeout: Optional[float] = None, **params) -> dict:
+        return await self._request("checkout.sessions.create", "POST", "/v1/checkout/sessions", params, timeout)
+
+    async def retrieve_checkout_session(self, session_id: str, timeout: Optional[float] = None) -> dict:
+        return await self._request("checkout.sessions.retrieve", "GET", f"/v1/checkout/sessions/{session_id}", timeout=timeout)
+
+    def stats(self) -> dict:
+        return {
+            operation: {**stats, "avg_ms": stats["total_ms"] / stats["count"] if stats["count"] else 0.0}
+            for operation, stats in self.metrics.items()
+        }
+
+    async def close(self):
+        await self._client.aclose()
+
+
+def create_stripe_client() -> StripeClient:
+    """A client configured from settings; its owner closes it."""
+    return StripeClient(
+        api_key=Config.STRIPE_SECRET_KEY,
+        base_url=Config.STRIPE_API_BASE,
+        timeout=Config.STRIPE_TIMEOUT_SECONDS,
+        max_retries=Config.STRIPE_MAX_RETRIES,
+        max_connections=Config.STRIPE_MAX_CONNECTIONS,
+    )
@@ -1,34 +1,41 @@
-import stripe
-from fastapi import HTTPException
+import time
+from typing import Optional
+
 from src.config import Config
 
+from .stripe_client import StripeClient
+
 class StripeService:
-    def __init__(self):
-        stripe.api_key = Config.STRIPE_SECRET_KEY
+    def __init__(self, client: StripeClient):
+        self.client = client
 
-    def create_checkout_session(self, user_email: str, amount: int, event_name: str, ticket_type: str, metadata: dict):
-        try:
-            session = stripe.checkout.Session.create(
-                payment_method_types=["card"],
-                line_items=[
-                    {
-                        "price_data": {
-                            "currency": "usd",
-                            "product_data": {
-                                "name": f"{ticket_type} Ticket for Event {event_name}",
-                            },
-                            "unit_amount": int(amount * 100),  # amount in cents
+    async def create_checkout_session(
+        self, user_email: str, amount: int, event_name: str, ticket_type: str, metadata: dict, expires_in: Optional[int] = None
+    ):
+        session = await self.client.create_checkout_session(
+            payment_method_types=["card"],
+            line_items=[
+                {
+                    "price_data": {
+                        "currency": "usd",
+                        "product_data": {
+                            "name": f"{ticket_type} Ticket for Event {event_name}",
                         },
-                        "quantity": 1,
-                    }
-                ],
-                mode="payment",
-                customer_email=user_email,
-                success_url = f"http://localhost:8000/api/v1/payments/success?session_id={{CHECKOUT_SESSION_ID}}",
-                cancel_url="http://localhost:3000/cancel",
-                metadata=metadata
-            )
+                        "unit_amount": int(amount * 100),  # amount in cents
+                    },
+                    "quantity": 1,
+                }
+            ],
+            mode="payment",
+            customer_email=user_email,
+            success_url=f"{Config.PAYMENT_SUCCESS_URL}?session_id={{CHECKOUT_SESSION_ID}}",
+            cancel_url=Config.PAYMENT_CANCEL_URL,
+            metadata=metadata,
+            # Stripe accepts 30 minutes to 24 hours
+            expires_at=int(time.time()) + expires_in if expires_in else None,
+        )
+
+        return session["url"]
 
-            return session.url
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=str(e))
+    async def retrieve_checkout_session(self, session_id: str) -> dict:
+        return await self.client.retrieve_checkout_session(session_id)
@@ -0,0 +1,44 @@
+import hashlib
+import hmac
+import json
+import time
+from typing import Optional
+
+from src.errors import InvalidWebhookSignature
+
+
+def sign_payload(payload: bytes, secret: str, timestamp: int) -> str:
+    """Stripe's v1 scheme: HMAC-SHA256 of "<timestamp>.<raw body>"."""
+    return hmac.new(secret.encode(), f"{timestamp}.".encode() + payload, hashlib.sha256).hexdigest()
+
+
+def verify_webhook(payload: bytes, signature_header: Optional[str], secret: str, tolerance: int = 300) -> dict:
+    """
+    Check the Stripe-Signature header against the raw request body and return
+    the decoded event. Signatures older than `tolerance` seconds are rejected
+    so captured deliveries cannot be replayed.
+    """
+    if not secret or not signature_header:
+        raise InvalidWebhookSignature()
+
+    timestamp, signatures = None, []
+    for item in signature_header.split(","):
+        key, _, value = item.strip().partition("=")
+        if key == "t":
+            timestamp = value
+        elif key == "v1":
+            signatures.append(value)
+
+    try:
+        timestamp = int(timestamp)
+    except (TypeError, ValueError):
+        raise InvalidWebhookSignature()
+
+    if abs(time.time() - timestamp) > tolerance:
+        raise InvalidWebhookSignature()
+
+    expected = sign_payload(payload, secret, timestamp)
+    if not any(hmac.compare_digest(expected, signature) for signature in signatures):
+        raise InvalidWebhookSignature()
+
+    return json.loads(payload)
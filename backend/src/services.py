@@ -0,0 +1,76 @@
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import Request
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from src.auth.revocations import TokenRevocations
+from src.auth.service import UserService
+from src.auth.utils import token_cache
+from src.checkin.service import CheckInService
+from src.events.service import EventService
+from src.jobs.queue import JobQueue
+from src.jobs.tasks import register_tasks
+from src.payments.fulfillment import PaymentFulfillment
+from src.payments.stripe_client import StripeClient, create_stripe_client
+from src.payments.stripe_service import StripeService
+
+
+@dataclass
+class Services:
+    """Services shared by every request for the lifetime of the app."""
+
+    user_service: UserService
+    event_service: EventService
+    stripe_service: StripeService
+    checkin_service: CheckInService
+    fulfillment: PaymentFulfillment
+    jobs: JobQueue
+    stripe_client: StripeClient
+    revocations: TokenRevocations
+
+    async def close(self):
+        await self.revocations.stop()
+        await self.stripe_client.close()
+
+
+def create_services(db: AsyncIOMotorDatabase, stripe_client: Optional[StripeClient] = None) -> Services:
+    """Without a stripe_client one is created from settings; Services.close() closes it either way."""
+    stripe_client = stripe_client or create_stripe_client()
+    jobs = JobQueue(db)
+    user_service = UserService(db)
+    event_service = EventService(db, user_service=user_service, job_queue=jobs)
+    services = Services(
+        user_service=user_service,
+        event_service=event_service,
+        stripe_service=StripeService(stripe_client),
+        checkin_service=CheckInService(db),
+        fulfillment=PaymentFulfillment(db, event_service, user_service, jobs),
+        jobs=jobs,
+        stripe_client=stripe_client,
+        revocations=TokenRevocations(db, token_cache),
+    )
+    register_tasks(jobs, services)
+    return services
+
+
+def get_user_service(request: Request) -> UserService:
+    return request.app.state.services.user_service
+
+def get_event_service(request: Request) -> EventService:
+    return request.app.state.services.event_service
+
+def get_stripe_service(request: Request) -> StripeService:
+    return request.app.state.services.stripe_service
+
+def get_checkin_service(request: Request) -> CheckInService:
+    return request.app.state.services.checkin_service
+
+def get_payment_fulfillment(request: Request) -> PaymentFulfillment:
+    return request.app.state.services.fulfillment
+
+def get_job_queue(request: Request) -> JobQueue:
+    return request.app.state.services.jobs
+
+def get_token_revocations(request: Request) -> TokenRevocations:
+    return request.app.state.services.revocations